@@ -0,0 +1,122 @@
+# Class that generates the stream of patients arriving at the clinic - the
+# time until the next arrival, plus each patient's randomly sampled
+# attributes (e.g. their priority and how patient they are).  Rather than
+# drawing each value as it's needed (several calls into numpy for every
+# patient), the values are drawn from numpy in blocks and handed out one
+# patient at a time, which is much quicker when there are lots of arrivals.
+# Each value is drawn from its own random number stream, so changing how
+# (or whether) one attribute is sampled doesn't change the others.
+# Patients arrive at the same rate all the time, unless a RateTable is given
+# for an arrival rate that changes over time (e.g. by the hour of the day).
+# To use, create an instance of the class with the random number stream and
+# mean for the inter-arrival times and a dictionary of integer attributes,
+# then loop over the instance - each loop gives the inter-arrival time and a
+# tuple of the attribute values (in the same order as the dictionary) for
+# the next patient.  For example :
+#
+#   arrivals = ArrivalStream.ArrivalStream(
+#       streams.get("arrivals"), 5,
+#       {"priority": (streams.get("priority"), 1, 5)})
+#
+#   for sampled_inter, (priority,) in arrivals:
+#       ...
+
+import numpy as np
+
+class ArrivalStream:
+    """
+    Encapsulates a stream of inter-arrival times and patient attributes
+    sampled in blocks
+    """
+    def __init__(self, inter_arrival_rng, mean_inter, attributes=None,
+                 block_size=1000, rate_table=None):
+        """
+        Params:
+        -------
+        inter_arrival_rng = numpy Generator to draw inter-arrival times from
+        mean_inter = mean inter-arrival time (times are exponentially
+        distributed)
+        attributes = dictionary of attribute names and (Generator, lowest
+        value, highest value) tuples - each attribute is a random integer
+        from lowest to highest (inclusive)
+        block_size = number of patients to draw values for at a time
+        rate_table = RateTable giving an arrival rate that changes over time
+        (from time 0), or None for inter-arrival times with a mean of
+        mean_inter all the time
+        """
+        self.inter_arrival_rng = inter_arrival_rng
+        self.mean_inter = mean_inter
+        self.attributes = dict(attributes or {})
+        self.block_size = block_size
+        self.rate_table = rate_table
+
+        # Records drawn in the current block that haven't been handed out yet
+        self._block = iter(())
+
+        # With a rate table, the cumulative rates and times of the arrivals
+        # in the current block, starting with the arrival before the block
+        # (so the stream can carry on from any record in the block)
+        self._block_totals = np.zeros(1)
+        self._block_times = np.zeros(1)
+
+    def __iter__(self):
+        while True:
+            record = next(self._block, None)
+
+            if record is None:
+                self._block = self.sample_block()
+            else:
+                yield record
+
+    def discard_buffer(self):
+        """
+        Throw away any records that have been drawn but not handed out yet,
+        so the next record is drawn fresh (e.g. after the random number
+        streams have been reseeded)
+        """
+        if self.rate_table is not None:
+            # Carry on the arrival times from the last record handed out
+            handed_out = len(self._block_totals) - 1 - len(list(self._block))
+            self._block_totals = self._block_totals[handed_out:handed_out + 1]
+            self._block_times = self._block_times[handed_out:handed_out + 1]
+
+        self._block = iter(())
+
+    def sample_block(self):
+        """
+        Returns an iterator over the next block_size patients' inter-arrival
+        times and attribute tuples
+        """
+        if self.rate_table is None:
+            inter_arrivals = self.inter_arrival_rng.exponential(
+                self.mean_inter, size=self.block_size).tolist()
+        else:
+            inter_arrivals = self.sample_rate_table_block()
+
+        if not self.attributes:
+            return zip(inter_arrivals, [()] * len(inter_arrivals))
+
+        columns = [
+            rng.integers(low, high, size=self.block_size,
+                         endpoint=True).tolist()
+            for rng, low, high in self.attributes.values()
+        ]
+
+        return zip(inter_arrivals, zip(*columns))
+
+    def sample_rate_table_block(self):
+        """
+        Returns a list of the next block_size inter-arrival times at the
+        rate given by the rate table, worked out by inversion (see RateTable)
+        """
+        totals = np.cumsum(np.concatenate((
+            self._block_totals[-1:],
+            self.inter_arrival_rng.exponential(1, size=self.block_size))))
+        times = self.rate_table.arrival_times(totals[1:])
+
+        self._block_totals = totals
+        self._block_times = np.concatenate((self._block_times[-1:], times))
+
+        # (once the arrivals have stopped, the times are all inf)
+        with np.errstate(invalid="ignore"):
+            return np.diff(self._block_times).tolist()
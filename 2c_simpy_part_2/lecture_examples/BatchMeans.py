@@ -0,0 +1,112 @@
+# Class that analyses the results of a single long run of a model using the
+# method of batch means, as an alternative to running a Trial of many
+# independent runs.  The model is run once, with one warm-up period, and the
+# results recorded after the warm-up are split into a number of batches of
+# equal (simulated) length.  The mean of each batch is treated as if it came
+# from a separate run, so the means and confidence intervals are worked out
+# from the batch means in the same way as for a Trial's runs - without paying
+# for a warm-up period in every run.  The batches need to be long enough that
+# the mean of one batch doesn't depend on the mean of the batch before, so
+# use a much longer sim_duration than you would for a single run of a Trial.
+# To use, create an instance of the class with the Model class and scenario
+# you want to run, and call the run method.  For example :
+#
+#   from lecture_examples import BatchMeans, Scenario, reneging_example
+#
+#   batch_means = BatchMeans.BatchMeans(
+#       reneging_example.Model,
+#       Scenario.Scenario.from_class(reneging_example.g).replace(
+#           sim_duration=100 * 2880)
+#   )
+#   batch_means.run()
+
+import numpy as np
+if __package__:
+    from . import RunningStats
+else:
+    import RunningStats
+
+class BatchMeans:
+    """
+    Encapsulates a batch means analysis of a single long run of a model
+    """
+    def __init__(self, model_class, scenario, n_batches=20, run_number=0,
+                 confidence=0.95, headless=False):
+        """
+        Params:
+        -------
+        model_class = Model class of the model to run
+        scenario = Scenario to run.  The run lasts for its warm_up_period
+        plus its sim_duration, and the sim_duration is split into batches.
+        n_batches = number of batches to split the results into
+        run_number = run number of the run (which sets its random numbers)
+        confidence = confidence level of the intervals (e.g. 0.95 for 95%)
+        headless = whether to run without printing anything
+        """
+        self.model_class = model_class
+        self.scenario = scenario
+        self.n_batches = n_batches
+        self.run_number = run_number
+        self.confidence = confidence
+        self.headless = headless
+
+    def run(self):
+        """
+        Do the long run of the model, and store the mean of each batch plus
+        the mean and confidence interval half width across the batches
+        """
+        my_model = self.model_class(self.run_number, self.scenario,
+                                    headless=True)
+        my_model.run()
+
+        results_df = my_model.results_df
+        columns = [column for column in results_df.columns
+                   if column != "Time"]
+
+        # Work out which batch each result falls in, by the time it was
+        # recorded
+        batch_length = self.scenario.sim_duration / self.n_batches
+        batch_number = np.minimum(
+            ((results_df["Time"].to_numpy() - self.scenario.warm_up_period) //
+             batch_length).astype("int64"),
+            self.n_batches - 1
+        )
+
+        self.df_batch_results = (
+            results_df[columns].groupby(batch_number).mean()
+        )
+        self.df_batch_results.index.name = "Batch Number"
+        self.df_batch_results.columns = [f"Mean {column}"
+                                         for column in columns]
+
+        self.calculate_means_over_batches()
+
+        if not self.headless:
+            self.print_batch_results()
+
+    def calculate_means_over_batches(self):
+        """
+        Store the mean of each result across the batches, and the half width
+        of its confidence interval
+        """
+        stats = RunningStats.RunningStats(len(self.df_batch_results.columns))
+
+        for results in self.df_batch_results.itertuples(index=False):
+            stats.update(results)
+
+        self.means = dict(zip(self.df_batch_results.columns, stats.mean))
+        self.half_widths = dict(zip(self.df_batch_results.columns,
+                                    stats.half_width(self.confidence)))
+
+    def print_batch_results(self):
+        """
+        Print the mean of each batch, and the means and confidence intervals
+        across the batches
+        """
+        print ("Batch Results")
+        print (self.df_batch_results)
+
+        for column, mean in self.means.items():
+            print (f"{column} : {mean:.1f} +/-",
+                   f"{self.half_widths[column]:.1f}",
+                   f"({self.confidence:.0%} confidence interval)")
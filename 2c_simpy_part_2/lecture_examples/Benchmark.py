@@ -0,0 +1,202 @@
+# Script to measure how quickly each of the example models runs, so we can
+# tell whether a change to the models (or the classes they use) makes them
+# faster or slower.  Each model is run for a range of run lengths and arrival
+# rates, and for each combination we record :
+#   - the wall time per run (the quickest of a few repeats)
+#   - the number of SimPy events processed per second
+#   - the number of patients generated per second
+#   - the peak memory allocated during a run
+# The events and memory are measured in a separate run from the timed ones,
+# as counting events and measuring memory slow Python down.
+# The results are added to a JSON lines file, along with the git commit they
+# were measured on, and compared to the results of the last commit in the
+# file that was different.  Run from the folder above this one with, for
+# example :
+#
+#   python -m lecture_examples.Benchmark
+#   python -m lecture_examples.Benchmark --models reneging_example
+#
+# Results from different machines aren't comparable, so compare commits on
+# the same machine.
+
+import argparse
+import datetime
+import importlib
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import pandas as pd
+if __package__:
+    from . import EXAMPLES
+else:
+    from __init__ import EXAMPLES
+
+# Run lengths (sim_duration, in minutes - the warm-up period is added on top)
+# and mean inter-arrival times to benchmark each model at
+HORIZONS = [2880, 14400]
+INTER_ARRIVAL_TIMES = [5, 1]
+
+# Function to return the git commit of the working folder (with "-dirty" on
+# the end if there are uncommitted changes), or None if it isn't available
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True,
+                                check=True).stdout.strip()
+        changes = subprocess.run(["git", "status", "--porcelain",
+                                  "--untracked-files=no"],
+                                 capture_output=True, text=True,
+                                 check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return f"{commit}-dirty" if changes else commit
+
+# Function to return the scenario to benchmark a model at.  The number of
+# each resource is scaled up along with the arrival rate, so that the clinic
+# is about as busy at every arrival rate (rather than the queues growing
+# without limit).
+def benchmark_scenario(module, horizon, inter):
+    scenario = module.Scenario.Scenario.from_class(module.g)
+    scale = scenario.patient_inter / inter
+
+    changes = {
+        name: max(1, round(value * scale))
+        for name, value in scenario.as_dict().items()
+        if name.startswith("number_of_") and name != "number_of_runs"
+    }
+
+    return scenario.replace(sim_duration=horizon, patient_inter=inter,
+                            **changes)
+
+# Function to do a single run of a model and return the wall time and number
+# of patients
+def time_run(module, scenario):
+    my_model = module.Model(0, scenario, headless=True)
+
+    start = time.perf_counter()
+    my_model.run()
+    wall_time = time.perf_counter() - start
+
+    return wall_time, my_model.patient_counter
+
+# Function to do a single run of a model and return the number of SimPy
+# events scheduled in it and the peak memory (in bytes) allocated during it
+def measure_run(module, scenario):
+    tracemalloc.start()
+
+    my_model = module.Model(0, scenario, headless=True)
+
+    # Count the events by wrapping the environment's schedule method, which
+    # every event goes through
+    events = 0
+    schedule = my_model.env.schedule
+
+    def counted_schedule(*args, **kwargs):
+        nonlocal events
+        events += 1
+        schedule(*args, **kwargs)
+
+    my_model.env.schedule = counted_schedule
+    my_model.run()
+
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return events, peak
+
+# Function to benchmark a model at every run length and arrival rate, and
+# return a list of results
+def benchmark_model(model_name, repeats=3):
+    if __package__:
+        module = importlib.import_module(f".{model_name}", __package__)
+    else:
+        module = importlib.import_module(model_name)
+    results = []
+
+    for horizon in HORIZONS:
+        for inter in INTER_ARRIVAL_TIMES:
+            scenario = benchmark_scenario(module, horizon, inter)
+
+            runs = [time_run(module, scenario) for _ in range(repeats)]
+            wall_time, patients = min(runs)
+            events, peak = measure_run(module, scenario)
+
+            results.append({
+                "Model": model_name,
+                "Horizon": horizon,
+                "Inter Arrival Time": inter,
+                "Wall Time Per Run": wall_time,
+                "Events Per Second": events / wall_time,
+                "Patients Per Second": patients / wall_time,
+                "Peak Memory MB": peak / 1e6
+            })
+
+            print (f"{model_name} horizon {horizon} inter-arrival {inter} :",
+                   f"{wall_time:.3f} s per run")
+
+    return results
+
+# Function to print how the results of this commit compare to the last
+# different commit in the results file (a ratio of more than 1 means this
+# commit is faster, or uses less memory)
+def compare(df_results, commit):
+    df_current = df_results[df_results["Commit"] == commit]
+    df_previous = df_results[(df_results["Commit"] != commit) &
+                             df_results["Commit"].notna()]
+
+    if len(df_previous) == 0:
+        return
+
+    previous_commit = df_previous["Commit"].iloc[-1]
+    df_previous = df_previous[df_previous["Commit"] == previous_commit]
+
+    keys = ["Model", "Horizon", "Inter Arrival Time"]
+    df_current = df_current.drop_duplicates(keys, keep="last")
+    df_previous = df_previous.drop_duplicates(keys, keep="last")
+
+    df_compare = df_current.merge(df_previous, on=keys,
+                                  suffixes=("", " Previous"))
+    df_compare["Speed Up"] = (df_compare["Wall Time Per Run Previous"] /
+                              df_compare["Wall Time Per Run"])
+    df_compare["Memory Saving"] = (df_compare["Peak Memory MB Previous"] /
+                                   df_compare["Peak Memory MB"])
+
+    print (f"Compared to commit {previous_commit}")
+    print (df_compare[keys + ["Speed Up", "Memory Saving"]]
+           .to_string(index=False))
+
+# Run the benchmarks, store the results and compare them to the last commit
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the example clinic models")
+    parser.add_argument("--models", nargs="+", default=EXAMPLES,
+                        help="models to benchmark (default: all of them)")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="number of timed runs of each benchmark")
+    parser.add_argument("--output", default="benchmark_results.jsonl",
+                        help="file to add the results to")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    details = {
+        "Commit": commit,
+        "Timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "Python": platform.python_version(),
+        "Machine": platform.node()
+    }
+
+    with open(args.output, "a") as f:
+        for model_name in args.models:
+            for result in benchmark_model(model_name, args.repeats):
+                f.write(json.dumps({**details, **result}) + "\n")
+
+    df_results = pd.read_json(args.output, lines=True)
+    df_results = df_results[df_results["Machine"] == platform.node()]
+
+    print (df_results[df_results["Commit"] == commit]
+           .drop(columns=list(details)).to_string(index=False))
+
+    compare(df_results, commit)
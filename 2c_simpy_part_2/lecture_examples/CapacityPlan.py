@@ -0,0 +1,261 @@
+# Class that searches a set of resource configurations (e.g. numbers of
+# nurses and doctors) for the cheapest one that meets a service target (e.g.
+# a mean queuing time for the nurse of no more than 10 minutes), without
+# running a full trial of every configuration.
+# The search is done in rounds.  In the first round, every configuration gets
+# a few runs.  After each round, a configuration is dropped as soon as the
+# confidence interval for one of its results is entirely above the target,
+# and is confirmed as meeting the target once the intervals for all of its
+# results are within it.  Once a configuration is confirmed, every more
+# expensive one is dropped, as it can't be the cheapest.  The configurations
+# that are still undecided then get twice as many runs in the next round,
+# until every configuration cheaper than the best one is decided (or has had
+# max_runs runs, in which case it is judged on its mean results - and misses
+# the target if a result in the target had no values in any run).  Clearly
+# good or bad configurations are therefore settled after a few runs, and the
+# runs are spent on the ones close to the target.
+# Every configuration does the same runs (run numbers 0, 1, 2...), so they
+# all see the same random numbers - the same patients arriving at the same
+# times, with the same consultation times and patience.  Differences between
+# the configurations' results are then down to the configurations
+# themselves rather than the luck of the draw.
+# To use, create an instance of the class with the Trial class of the model,
+# the scenario to start from, a dictionary of the parameter values to try,
+# the cost of one unit of each parameter and the highest mean allowed for
+# each trial result in the target, then call the run method.  For example :
+#
+#   from lecture_examples import CapacityPlan, Scenario, choose_queue_example
+#
+#   plan = CapacityPlan.CapacityPlan(
+#       choose_queue_example.Trial,
+#       Scenario.Scenario.from_class(choose_queue_example.g),
+#       {"number_of_nurses": [1, 2, 3], "number_of_doctors": [1, 2, 3],
+#        "max_q_nurse": [5, 10, 20]},
+#       costs={"number_of_nurses": 1, "number_of_doctors": 2},
+#       targets={"Mean Q Time Nurse": 10, "Reneged Q Doctor": 5}
+#   )
+#   best_scenario = plan.run(n_workers=None)
+#   print (plan.df_plan_results)
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import pandas as pd
+
+if __package__:
+    from . import RunningStats
+    from . import TrialBase
+else:
+    import RunningStats
+    import TrialBase
+
+class CapacityPlan:
+    """
+    Encapsulates a search for the cheapest resource configuration that meets
+    a service target
+    """
+    def __init__(self, trial_class, base_scenario, grid, costs, targets,
+                 confidence=0.95, initial_runs=5, max_runs=80):
+        """
+        Params:
+        -------
+        trial_class = Trial class of the model to run
+        base_scenario = Scenario holding the values of any parameters that
+        aren't in the grid
+        grid = dictionary of parameter names and lists of values to try
+        costs = dictionary of parameter names and the cost of one unit of
+        each (e.g. one nurse) - a configuration's cost is the total over the
+        parameters in the grid, and parameters left out cost nothing
+        targets = dictionary of trial result names (columns of the trial
+        results) and the highest mean allowed for each
+        confidence = confidence level of the intervals used to decide whether
+        a configuration meets the target
+        initial_runs = number of runs each configuration gets in the first
+        round (at least 2)
+        max_runs = most runs any configuration gets
+        """
+        if initial_runs < 2:
+            raise ValueError("Each configuration needs at least 2 runs in the "
+                             + "first round")
+
+        self.trial_class = trial_class
+        self.base_scenario = base_scenario
+        self.grid = grid
+        self.costs = costs
+        self.targets = targets
+        self.confidence = confidence
+        self.initial_runs = initial_runs
+        self.max_runs = max_runs
+
+    def scenarios(self):
+        """
+        Returns a list of scenarios, one for each combination of the
+        parameter values in the grid, from cheapest to most expensive
+        """
+        names = list(self.grid)
+
+        scenarios = [
+            self.base_scenario.replace(**dict(zip(names, values)))
+            for values in itertools.product(*self.grid.values())
+        ]
+
+        return sorted(scenarios, key=self.cost)
+
+    def cost(self, scenario):
+        """
+        Returns the cost of the configuration in a scenario
+
+        Params:
+        -------
+        scenario = Scenario to get the cost of
+        """
+        return sum(self.costs.get(name, 0) * getattr(scenario, name)
+                   for name in self.grid)
+
+    def run(self, n_workers=1):
+        """
+        Search the grid for the cheapest configuration that meets the target,
+        and store the results of every configuration
+
+        Params:
+        -------
+        n_workers = number of worker processes to spread the runs across
+        (None uses every core)
+
+        Returns:
+        -------
+        Scenario of the cheapest configuration that meets the target, or
+        None if none of them do
+        """
+        run_replication = partial(TrialBase.run_replication,
+                                  self.trial_class.model_class,
+                                  headless=True)
+
+        scenarios = self.scenarios()
+        self.trials = {scenario: self.trial_class(scenario, headless=True)
+                       for scenario in scenarios}
+
+        columns = list(self.trials[scenarios[0]].df_trial_results.columns)
+        for name in self.targets:
+            if name not in columns:
+                raise ValueError(f"Unknown trial result in target : {name}")
+        target_columns = [columns.index(name) for name in self.targets]
+        limits = list(self.targets.values())
+
+        stats = {scenario: RunningStats.RunningStats(len(columns))
+                 for scenario in scenarios}
+        self.status = {}
+
+        # The configurations still to be decided, and the cheapest one
+        # confirmed as meeting the target so far
+        undecided = list(scenarios)
+        best = None
+        runs_to = self.initial_runs
+
+        if n_workers == 1:
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=n_workers)
+
+        try:
+            while undecided:
+                # Every undecided configuration does the runs it hasn't done
+                # yet, up to runs_to
+                to_run = [(run, scenario) for scenario in undecided
+                          for run in range(stats[scenario].count, runs_to)]
+                runs = [run for run, scenario in to_run]
+                run_scenarios = [scenario for run, scenario in to_run]
+
+                if pool is None:
+                    run_results = list(map(run_replication, runs,
+                                           run_scenarios))
+                else:
+                    run_results = list(pool.map(run_replication, runs,
+                                                run_scenarios))
+
+                for (run, scenario), results in zip(to_run, run_results):
+                    self.trials[scenario].df_trial_results.loc[run] = results
+                    stats[scenario].update(results)
+
+                for scenario in undecided:
+                    means = stats[scenario].mean[target_columns]
+                    half_widths = stats[scenario].half_width(
+                        self.confidence)[target_columns]
+
+                    if runs_to >= self.max_runs:
+                        if (stats[scenario].counts[target_columns] == 0).any():
+                            # A result in the target with no values in any
+                            # run (e.g. a mean queuing time of nan when
+                            # nobody queued) can't be compared with it
+                            self.status[scenario] = "misses target"
+                            continue
+
+                        # Out of runs, so go on the mean results
+                        half_widths[:] = 0
+
+                    if any(mean - half_width > limit for mean, half_width,
+                           limit in zip(means, half_widths, limits)):
+                        self.status[scenario] = "misses target"
+                    elif all(mean + half_width <= limit for mean, half_width,
+                             limit in zip(means, half_widths, limits)):
+                        self.status[scenario] = "meets target"
+
+                        if (best is None or
+                            self.cost(scenario) < self.cost(best)):
+                            best = scenario
+
+                undecided = [scenario for scenario in undecided
+                             if scenario not in self.status]
+
+                # Drop any configurations that aren't cheaper than the best
+                if best is not None:
+                    for scenario in undecided:
+                        if self.cost(scenario) >= self.cost(best):
+                            self.status[scenario] = "not cheaper"
+
+                    undecided = [scenario for scenario in undecided
+                                 if self.cost(scenario) < self.cost(best)]
+
+                runs_to = min(runs_to * 2, self.max_runs)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.best_scenario = best
+        self.total_runs = sum(s.count for s in stats.values())
+
+        for scenario in scenarios:
+            self.trials[scenario].calculate_means_over_trial()
+
+        self.calculate_plan_results(scenarios, stats, columns, target_columns)
+
+        return best
+
+    def calculate_plan_results(self, scenarios, stats, columns,
+                               target_columns):
+        """
+        Store a DataFrame with a row for each configuration, from cheapest
+        to most expensive, giving the parameter values, cost, number of
+        runs, what was decided about it, and the mean and confidence interval
+        half width of each trial result in the target
+        """
+        rows = []
+
+        for scenario in scenarios:
+            row = {name: getattr(scenario, name) for name in self.grid}
+            row["Cost"] = self.cost(scenario)
+            row["Runs"] = stats[scenario].count
+            row["Status"] = self.status[scenario]
+
+            if stats[scenario].count > 1:
+                half_widths = stats[scenario].half_width(self.confidence)
+            else:
+                half_widths = [float("nan")] * len(columns)
+
+            for i in target_columns:
+                row[columns[i]] = stats[scenario].mean[i]
+                row[f"{columns[i]} +/-"] = half_widths[i]
+
+            rows.append(row)
+
+        self.df_plan_results = pd.DataFrame(rows)
@@ -0,0 +1,142 @@
+# Class that saves checkpoints of a run of a model to disk as it goes, so a
+# long run that is stopped part way through (e.g. because the machine it's
+# running on is shut down) can be carried on from its last checkpoint rather
+# than started again from the beginning.
+# A checkpoint is saved every interval minutes of simulated time, and again
+# at the end of the run (so re-running a trial that was stopped part way
+# through only has to finish off the runs that hadn't finished).  Each
+# checkpoint replaces the last one for the run, and is written to a
+# temporary file first, so there is always a complete checkpoint to go back
+# to even if the run is stopped while one is being saved.
+# SimPy processes are Python generators, which can't be saved, so the model
+# has to provide the state of the run (its random number streams, results so
+# far, the patients in the clinic and the times of anything that's due to
+# happen) through a checkpoint_state method, and restart its processes from
+# that state in a resume method (see the example models).
+# To use, set checkpoint_dir (and checkpoint_interval, if you want it to be
+# different to the default) in the g class or scenario of one of the example
+# models, and run it as usual.  Runs are carried on from their checkpoint in
+# that folder automatically if there is one, so to resume a trial that was
+# stopped, just run it again.  For example :
+#
+#   from lecture_examples import Scenario, reneging_example
+#
+#   scenario = Scenario.Scenario.from_class(reneging_example.g).replace(
+#       checkpoint_dir="checkpoints", checkpoint_interval=10080)
+#   my_trial = reneging_example.Trial(scenario)
+#   my_trial.run_trial()
+
+import os
+import pickle
+
+# Function for a generator that waits for the given delay before carrying on
+# with another generator (used to restart a process that was part way
+# through waiting when a checkpoint was saved)
+def delayed(env, delay, generator):
+    yield env.timeout(delay)
+    yield from generator
+
+class Checkpoint:
+    """
+    Encapsulates the checkpoints saved for a single run of a model
+    """
+    def __init__(self, folder, run_number, interval):
+        """
+        Params:
+        -------
+        folder = folder to save the checkpoints for every run in.  Each run's
+        checkpoint is saved as run=<run_number>.pkl in this folder.
+        run_number = number of the run the checkpoints are for
+        interval = simulated time between checkpoints
+        """
+        self.path = os.path.join(folder, f"run={run_number}.pkl")
+        self.interval = interval
+
+    def exists(self):
+        """
+        Returns whether a checkpoint has been saved for the run
+        """
+        return os.path.exists(self.path)
+
+    def save(self, model):
+        """
+        Save the current state of a run to the checkpoint file
+
+        Params:
+        -------
+        model = Model being run
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        checkpoint = {
+            "scenario": model.scenario,
+            "now": model.env.now,
+            "state": model.checkpoint_state()
+        }
+
+        # Make sure the whole checkpoint is on disk before it replaces the
+        # last one
+        temp_path = self.path + ".tmp"
+
+        with open(temp_path, "wb") as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, self.path)
+
+    def load(self, scenario):
+        """
+        Returns the time the checkpoint was saved and the state of the run
+        at that time
+
+        Params:
+        -------
+        scenario = Scenario being run.  This must be the scenario the
+        checkpoint was saved for.
+
+        Returns:
+        -------
+        tuple of the simulated time and the state returned by the model's
+        checkpoint_state method
+        """
+        with open(self.path, "rb") as f:
+            checkpoint = pickle.load(f)
+
+        if checkpoint["scenario"] != scenario:
+            raise ValueError(
+                f"Checkpoint {self.path} was saved for a different scenario " +
+                "(delete it, or use a different checkpoint_dir)"
+            )
+
+        return checkpoint["now"], checkpoint["state"]
+
+    def run(self, model, until):
+        """
+        Run the model until the given time, saving a checkpoint every
+        interval and at the end
+
+        Params:
+        -------
+        model = Model to run
+        until = simulated time to run the model until
+        """
+        # Patient level results streamed to disk after the last checkpoint
+        # would be written again when the run is resumed
+        if model.patient_sink is not None:
+            raise ValueError(
+                "Runs that write patient level results to a PatientSink " +
+                "can't be checkpointed"
+            )
+
+        # Checkpoints are saved at whole numbers of intervals.  With a float
+        # interval, the first one past now can round back down to now, so
+        # step on until it is actually later.
+        step = int(model.env.now // self.interval) + 1
+        while step * self.interval <= model.env.now:
+            step += 1
+
+        while model.env.now < until:
+            model.env.run(until=min(step * self.interval, until))
+            self.save(model)
+            step += 1
@@ -0,0 +1,117 @@
+# Class that stores records (e.g. patient-level results, or queue lengths over
+# time) as they happen during a run.  Each column is stored in its own numpy
+# array with a fixed type.  The arrays start with space for a number of rows,
+# and double in size whenever they fill up, so adding a record is quick no
+# matter how many records are already stored.  This is much quicker than
+# adding rows to a pandas DataFrame one at a time, which copies data every
+# time the DataFrame grows.  To use, create an instance of the class with
+# the names and types of the columns, call the append method with the values
+# for each new record, and call the to_dataframe method once at the end of
+# the run (pandas is only imported when to_dataframe is called).
+
+import numpy as np
+
+class EventLog:
+    """
+    Encapsulates an append-only log of records stored in typed numpy columns
+    """
+    def __init__(self, columns, initial_size=1024):
+        """
+        Params:
+        -------
+        columns = dictionary of column names and numpy types (e.g.
+        {"Time": "float64", "Num in Q Nurse": "int64"}), in the order the
+        values will be passed to append
+        initial_size = number of records to make space for to begin with
+        """
+        self.columns = dict(columns)
+        self._arrays = [np.empty(initial_size, dtype=dtype)
+                        for dtype in self.columns.values()]
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, *values):
+        """
+        Add a record to the end of the log
+
+        Params:
+        -------
+        values = value for each column, in the same order as the columns
+        """
+        if self._size == len(self._arrays[0]):
+            self._grow()
+
+        for array, value in zip(self._arrays, values):
+            array[self._size] = value
+
+        self._size += 1
+
+    def _grow(self):
+        """
+        Double the space available for records
+        """
+        for i, array in enumerate(self._arrays):
+            new_array = np.empty(max(2 * len(array), 1), dtype=array.dtype)
+            new_array[:self._size] = array[:self._size]
+            self._arrays[i] = new_array
+
+    def column(self, name):
+        """
+        Returns the values stored so far in the named column
+
+        Params:
+        -------
+        name = name of the column
+
+        Returns:
+        -------
+        numpy array (a view onto the log, so don't modify it)
+        """
+        index = list(self.columns).index(name)
+
+        return self._arrays[index][:self._size]
+
+    def mean(self, name):
+        """
+        Returns the mean of the values stored so far in the named column,
+        ignoring any missing (NaN) values, as pandas does
+
+        Params:
+        -------
+        name = name of the column
+
+        Returns:
+        -------
+        float (NaN if there are no values to take the mean of)
+        """
+        values = self.column(name)
+        values = values[~np.isnan(values)]
+
+        if len(values) == 0:
+            return float("nan")
+
+        return float(values.mean())
+
+    def clear(self):
+        """
+        Remove all of the records from the log (keeping the space that has
+        been made for them, so it can be filled again without growing)
+        """
+        self._size = 0
+
+    def to_dataframe(self):
+        """
+        Returns the records stored so far as a pandas DataFrame
+
+        Returns:
+        -------
+        pandas.DataFrame
+        """
+        import pandas as pd
+
+        return pd.DataFrame({
+            name: array[:self._size].copy()
+            for name, array in zip(self.columns, self._arrays)
+        })
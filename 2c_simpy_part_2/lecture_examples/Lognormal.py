@@ -4,6 +4,11 @@
 # needed by SimPy.  To use, create an instance of the class with your mean
 # and standard deviation values, and call the sample method on the instance
 # whenever you want to sample from the distribution.
+# If you are going to sample from the same distribution many times (e.g. for
+# every patient's consultation), create the instance once and pass a
+# block_size.  Samples are then drawn from numpy in blocks and handed out one
+# at a time, which is much quicker than drawing (or creating an instance for)
+# every individual sample.
 # Thanks to Prof Tom Monks, University of Exeter, for this code sample.
 # https://medicine.exeter.ac.uk/people/profile/index.php?web_id=Thomas_Monks
 
@@ -14,17 +19,27 @@ class Lognormal:
     """
     Encapsulates a lognormal distirbution
     """
-    def __init__(self, mean, stdev, random_seed=None):
+    def __init__(self, mean, stdev, random_seed=None, block_size=1):
         """
         Params:
         -------
         mean = mean of the lognormal distribution
         stdev = standard dev of the lognormal distribution
+        random_seed = seed (or numpy SeedSequence / Generator) for the stream
+        block_size = number of samples to draw from numpy at a time.  With the
+        default of 1, every call to sample draws a single value.
         """
         self.rand = np.random.default_rng(seed=random_seed)
         mu, sigma = self.normal_moments_from_lognormal(mean, stdev**2)
         self.mu = mu
         self.sigma = sigma
+        self.block_size = block_size
+
+        # Buffer of pre-drawn samples and the position of the next one to hand
+        # out.  Drawing in blocks gives exactly the same sequence of values as
+        # drawing them one at a time from the same seed.
+        self._buffer = []
+        self._position = 0
         
     def normal_moments_from_lognormal(self, m, v):
         '''
@@ -51,5 +66,33 @@ class Lognormal:
         """
         Sample from the normal distribution
         """
-        return self.rand.lognormal(self.mu, self.sigma)
+        if self.block_size == 1:
+            return self.rand.lognormal(self.mu, self.sigma)
+
+        if self._position == len(self._buffer):
+            self._refill()
+
+        value = self._buffer[self._position]
+        self._position += 1
+
+        return value
+
+    def discard_buffer(self):
+        """
+        Throw away any samples that have been drawn but not handed out yet,
+        so the next sample is drawn fresh (e.g. after the random number
+        stream has been reseeded)
+        """
+        self._buffer = []
+        self._position = 0
+
+    def _refill(self):
+        """
+        Draw the next block of samples in a single vectorised call
+        """
+        # tolist() gives plain Python floats, which are quicker to hand out
+        # one at a time than indexing into a numpy array
+        self._buffer = self.rand.lognormal(self.mu, self.sigma,
+                                           size=self.block_size).tolist()
+        self._position = 0
     
@@ -0,0 +1,155 @@
+# Class holding the parts of a Model that are the same in every example -
+# starting a run (or carrying it on from a checkpoint), running it to the
+# end, and forking it into a different run after a shared warm-up.  Each
+# example's Model inherits from it, so the example itself only needs the
+# parts that are specific to that model :
+#   - start_processes, to start up its DES generators
+#   - calculate_run_results and print_run_results, for the results of a run
+#   - replication_results, for the results stored against the run in a trial
+#   - resume_processes, to restart its DES generators (other than the
+#     arrivals) when a run carries on from a checkpoint
+#   - buffered_attributes, naming any of its attributes that draw random
+#     numbers in blocks (e.g. its Lognormal distributions), if there are
+#     more than just the arrivals
+#   - checkpoint_attributes, naming any of its attributes that are saved in
+#     a checkpoint, if there are more than those every model has
+# The Model must also have the env, scenario, headless, profiler,
+# checkpoint, patient_sink, streams and arrivals attributes set up in its
+# constructor, and a generator_patient_arrivals generator.  For example :
+#
+#   class Model(ModelBase.ModelBase):
+#       buffered_attributes = ("arrivals", "nurse_consult_time_dist")
+#       checkpoint_attributes = ModelBase.ModelBase.checkpoint_attributes + (
+#           "nurse_consult_time_dist",
+#       )
+#
+#       def start_processes(self):
+#           self.env.process(self.generator_patient_arrivals())
+
+if __package__:
+    from . import Checkpoint
+else:
+    import Checkpoint
+
+class ModelBase:
+    """
+    Encapsulates starting, finishing and forking a run of a model
+    """
+    # Attributes that draw random numbers in blocks, whose blocks are thrown
+    # away when the run is forked
+    buffered_attributes = ("arrivals",)
+
+    # Attributes holding the state of the run so far, that are saved in a
+    # checkpoint.  SimPy processes can't be saved, so these need to hold
+    # everything needed to restart them from where they had got to.
+    checkpoint_attributes = (
+        "streams",
+        "arrivals",
+        "patient_counter",
+        "results_log",
+        "patients_in_clinic",
+        "next_arrival_time"
+    )
+
+    def start(self):
+        """
+        Start up the processes of the run, ready to run the simulation
+        """
+        # Start profiling the run, if a profiler has been passed in (this has
+        # to happen before any processes are started)
+        if self.profiler is not None:
+            self.profiler.attach(self.env)
+
+        # Carry on from the last checkpoint saved for the run, if there is
+        # one, instead of starting the DES generators from the beginning
+        if self.checkpoint is not None and self.checkpoint.exists():
+            self.resume(*self.checkpoint.load(self.scenario))
+            return
+
+        self.start_processes()
+
+    def finish(self):
+        """
+        Run the simulation to the end (from wherever it has got to), and
+        calculate (and print) the results
+        """
+        # Run for the duration specified in the scenario, plus the warm-up
+        # period so the results cover the full duration (saving checkpoints
+        # along the way, if the scenario asks for them)
+        until = self.scenario.sim_duration + self.scenario.warm_up_period
+
+        if self.checkpoint is None:
+            self.env.run(until=until)
+        else:
+            self.checkpoint.run(self, until=until)
+
+        # Write any patient-level results not yet streamed to disk
+        if self.patient_sink is not None:
+            self.patient_sink.close()
+
+        # Calculate results over the run
+        self.calculate_run_results()
+
+        # Print (and plot) results for this run, unless we're running headless
+        if not self.headless:
+            self.print_run_results()
+
+    def checkpoint_state(self):
+        """
+        Return the state of the run so far, to be saved in a checkpoint
+
+        Returns:
+        -------
+        dict of the checkpoint_attributes, keyed by name
+        """
+        return {name: getattr(self, name)
+                for name in self.checkpoint_attributes}
+
+    def resume(self, now, state):
+        """
+        Carry on a run from the state saved in a checkpoint, instead of
+        starting it from the beginning
+
+        Params:
+        -------
+        now = time the checkpoint was saved
+        state = state of the run saved in the checkpoint
+        """
+        # Put the saved state back, and move the (still empty) simulation on
+        # to the time the checkpoint was saved
+        vars(self).update(state)
+
+        if now > 0:
+            self.env.run(until=now)
+
+        # Restart the model's own processes, and then the arrivals from when
+        # the next patient was due
+        self.resume_processes(now)
+
+        self.env.process(Checkpoint.delayed(
+            self.env, self.next_arrival_time - now,
+            self.generator_patient_arrivals()))
+
+    def run(self):
+        """
+        Run a single run of the simulation
+        """
+        self.start()
+        self.finish()
+
+    def fork(self, run_number):
+        """
+        Turn this model into a different run from now on - used to fork many
+        runs from a single shared warm-up.  Each forked run gets its own
+        random numbers after the fork (any that were already drawn in blocks
+        are thrown away).
+
+        Params:
+        -------
+        run_number = run number of the forked run
+        """
+        self.run_number = run_number
+        self.streams.reseed(run_number)
+
+        for name in self.buffered_attributes:
+            getattr(self, name).discard_buffer()
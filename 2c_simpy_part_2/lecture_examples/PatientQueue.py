@@ -0,0 +1,68 @@
+# Class used to keep track of the patients waiting in a queue.  It can be used
+# in the same way as a list (append a patient when they join the queue, remove
+# them when they leave, and use len() to get the length of the queue), but the
+# patients are stored in a dictionary keyed by patient ID.  Removing a patient
+# from a list means searching through the list for them, which gets slower the
+# longer the queue is.  Removing a patient from a dictionary takes the same
+# (short) time however long the queue is.  Dictionaries remember the order
+# items were added, so looping over the queue still gives the patients in the
+# order they joined it.  If a QueueMonitor is passed in, it is updated every
+# time the queue changes length.
+
+class PatientQueue:
+    """
+    Encapsulates the patients waiting in a queue
+    """
+    def __init__(self, env=None, monitor=None):
+        """
+        Params:
+        -------
+        env = SimPy environment (only needed if a monitor is passed in)
+        monitor = QueueMonitor to update whenever the queue changes length
+        """
+        self.env = env
+        self.monitor = monitor
+        self._patients = {}
+
+    def __getstate__(self):
+        # The SimPy environment can't be pickled (e.g. when the queue is saved
+        # in a checkpoint), so it has to be set again once the queue is loaded
+        state = self.__dict__.copy()
+        state["env"] = None
+
+        return state
+
+    def __len__(self):
+        return len(self._patients)
+
+    def __iter__(self):
+        return iter(self._patients.values())
+
+    def __contains__(self, patient):
+        return patient.id in self._patients
+
+    def append(self, patient):
+        """
+        Add a patient to the back of the queue
+
+        Params:
+        -------
+        patient = patient joining the queue
+        """
+        self._patients[patient.id] = patient
+
+        if self.monitor is not None:
+            self.monitor.update(self.env.now, len(self._patients))
+
+    def remove(self, patient):
+        """
+        Remove a patient from the queue (wherever they are in it)
+
+        Params:
+        -------
+        patient = patient leaving the queue
+        """
+        del self._patients[patient.id]
+
+        if self.monitor is not None:
+            self.monitor.update(self.env.now, len(self._patients))
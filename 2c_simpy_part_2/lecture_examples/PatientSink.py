@@ -0,0 +1,103 @@
+# Class that streams patient-level results to disk while a model runs,
+# rather than holding them all in memory.  Records are collected in typed
+# numpy columns (using an EventLog) and, every time batch_size records have
+# been collected, they are written to the file as a batch (a "row group" in
+# a Parquet file, or a record batch in an Arrow IPC file) and the columns are
+# emptied.  So the memory used stays the same however long the run is.
+# Each run writes its own file, in a folder named after the run number (e.g.
+# patients/run=3/part-0.parquet), so many runs (or worker processes) can
+# write at the same time, and the whole folder can be read back as one
+# dataset (e.g. with pandas.read_parquet("patients")).
+# This needs the pyarrow package, which is only imported when a sink is
+# created.  To use, create an instance of the class with the folder, the
+# names and types of the columns and the run number, call the append method
+# with the values for each patient, and call the close method at the end of
+# the run.
+
+import os
+if __package__:
+    from . import EventLog
+else:
+    import EventLog
+
+class PatientSink:
+    """
+    Encapsulates a stream of patient-level records written to a Parquet or
+    Arrow IPC file in batches
+    """
+    def __init__(self, folder, columns, run_number, batch_size=10000,
+                 file_format="parquet"):
+        """
+        Params:
+        -------
+        folder = folder to write the results of every run into
+        columns = dictionary of column names and numpy types, in the order
+        the values will be passed to append
+        run_number = run number of the run being recorded
+        batch_size = number of records to write to the file at a time
+        file_format = "parquet" or "arrow" (Arrow IPC)
+        """
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("Streaming patient-level results needs the "
+                              "pyarrow package (pip install pyarrow)")
+
+        if file_format not in ("parquet", "arrow"):
+            raise ValueError(f"Unknown file format {file_format!r} "
+                             "(expected 'parquet' or 'arrow')")
+
+        self._pa = pyarrow
+        self.file_format = file_format
+        self.batch_size = batch_size
+
+        run_folder = os.path.join(folder, f"run={run_number}")
+        os.makedirs(run_folder, exist_ok=True)
+        self.path = os.path.join(run_folder, f"part-0.{file_format}")
+
+        self.log = EventLog.EventLog(columns, initial_size=batch_size)
+
+        # The file is opened when the first batch is written
+        self._writer = None
+
+    def append(self, *values):
+        """
+        Add a patient's record, writing a batch to the file if it's full
+
+        Params:
+        -------
+        values = value for each column, in the same order as the columns
+        """
+        self.log.append(*values)
+
+        if len(self.log) == self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write any records collected so far to the file
+        """
+        if len(self.log) == 0 and self._writer is not None:
+            return
+
+        table = self._pa.table({name: self.log.column(name)
+                                for name in self.log.columns})
+
+        if self._writer is None:
+            if self.file_format == "parquet":
+                import pyarrow.parquet
+                self._writer = pyarrow.parquet.ParquetWriter(self.path,
+                                                             table.schema)
+            else:
+                import pyarrow.ipc
+                self._writer = pyarrow.ipc.new_file(self.path, table.schema)
+
+        self._writer.write_table(table)
+        self.log.clear()
+
+    def close(self):
+        """
+        Write any remaining records and close the file
+        """
+        self.flush()
+        self._writer.close()
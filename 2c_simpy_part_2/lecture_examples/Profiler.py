@@ -0,0 +1,162 @@
+# Class that records where a run of a model spends its time, to help work
+# out why a scenario is slow.  While attached to a model's SimPy
+# environment, it :
+#   - counts the events each process waits for, by type (arrival timeouts,
+#     activity timeouts, patience timeouts, resource requests and events
+#     waited for by a resource's breaks)
+#   - adds up the wall time spent running each process generator (e.g.
+#     generator_patient_arrivals, attend_clinic and take_breaks)
+#   - tracks the largest number of events waiting in SimPy's event queue
+# Profiling is switched on by passing a Profiler to the Model.  If no
+# Profiler is passed, nothing is wrapped or counted, so there is no cost.
+# For example :
+#
+#   from lecture_examples import Profiler, reneging_example
+#
+#   profiler = Profiler.Profiler()
+#   my_model = reneging_example.Model(0, profiler=profiler, headless=True)
+#   my_model.run()
+#   profiler.print_profile()
+
+import time
+from collections import Counter
+import simpy
+
+class Profiler:
+    """
+    Encapsulates counts of events and timings of process generators in a
+    run of a model
+    """
+    def __init__(self, process_categories=None):
+        """
+        Params:
+        -------
+        process_categories = dictionary of process generator names and the
+        category to count all of their events under.  By default, every
+        event of generator_patient_arrivals is an "arrival timeout" and
+        every event of take_breaks and resume_breaks is a "break".  Events of
+        other processes are counted by the type of event.
+        """
+        if process_categories is None:
+            process_categories = {
+                "generator_patient_arrivals": "arrival timeout",
+                "take_breaks": "break",
+                "resume_breaks": "break"
+            }
+        self.process_categories = process_categories
+
+        self.event_counts = Counter()
+        self.process_wall_time = Counter()
+        self.process_count = Counter()
+        self.events_scheduled = 0
+        self.peak_queue_size = 0
+
+    def attach(self, env):
+        """
+        Start profiling every process started in, and every event scheduled
+        in, the given environment from now on
+
+        Params:
+        -------
+        env = SimPy Environment to profile
+        """
+        process = env.process
+        schedule = env.schedule
+        queue = env._queue
+
+        def profiled_process(generator):
+            self.process_count[generator.__name__] += 1
+            return process(self.wrap(generator.__name__, generator))
+
+        def profiled_schedule(event, priority=simpy.events.NORMAL,
+                              delay=0):
+            schedule(event, priority, delay)
+            self.events_scheduled += 1
+            if len(queue) > self.peak_queue_size:
+                self.peak_queue_size = len(queue)
+
+        env.process = profiled_process
+        env.schedule = profiled_schedule
+
+    def wrap(self, name, generator):
+        """
+        Returns a generator that passes everything to and from the given
+        process generator, timing it and counting the events it waits for
+
+        Params:
+        -------
+        name = name of the process generator
+        generator = the process generator
+        """
+        value = None
+        exception = None
+
+        while True:
+            start = time.perf_counter()
+
+            try:
+                if exception is None:
+                    event = generator.send(value)
+                else:
+                    event = generator.throw(exception)
+            except StopIteration as stop:
+                self.process_wall_time[name] += time.perf_counter() - start
+                return stop.value
+            except BaseException:
+                self.process_wall_time[name] += time.perf_counter() - start
+                raise
+
+            self.process_wall_time[name] += time.perf_counter() - start
+            self.count_event(name, event)
+
+            try:
+                value = yield event
+                exception = None
+            except GeneratorExit:
+                generator.close()
+                raise
+            except BaseException as e:
+                value = None
+                exception = e
+
+    def count_event(self, name, event):
+        """
+        Add an event waited for by a process to the event counts
+
+        Params:
+        -------
+        name = name of the process generator waiting for the event
+        event = the event it's waiting for
+        """
+        if name in self.process_categories:
+            self.event_counts[self.process_categories[name]] += 1
+        elif isinstance(event, simpy.events.Condition):
+            # e.g. waiting for a resource or for the patient's patience to
+            # run out, whichever comes first
+            for inner_event in event._events:
+                if isinstance(inner_event, simpy.events.Timeout):
+                    self.event_counts["patience timeout"] += 1
+                else:
+                    self.count_event(name, inner_event)
+        elif isinstance(event, simpy.events.Timeout):
+            self.event_counts["activity timeout"] += 1
+        elif isinstance(event, simpy.resources.resource.Request):
+            self.event_counts["resource request"] += 1
+        else:
+            self.event_counts[type(event).__name__] += 1
+
+    def print_profile(self):
+        """
+        Print the event counts, process timings and peak event queue size
+        """
+        print ("Events waited for")
+        for category, count in self.event_counts.most_common():
+            print (f"  {category} : {count}")
+
+        print ("Wall time in process generators")
+        for name, wall_time in self.process_wall_time.most_common():
+            print (f"  {name} : {wall_time:.3f} s",
+                   f"({self.process_count[name]} processes)")
+
+        print (f"Events scheduled : {self.events_scheduled}")
+        print (f"Peak event queue size : {self.peak_queue_size}")
@@ -0,0 +1,101 @@
+# Class that keeps running, time-weighted statistics about the length of a
+# queue (e.g. the mean number of patients waiting, the most that were ever
+# waiting, and percentiles of the number waiting).  Every time the queue
+# changes length, the monitor adds the time spent at the previous length onto
+# a running total and a histogram.  Because only these totals are kept, the
+# memory used stays the same however long the model runs for, and the raw
+# trace of queue lengths doesn't need to be stored at all unless we want to
+# plot it.  To use, create an instance of the class for each queue, call the
+# update method with the current time and queue length whenever the queue
+# changes, and call the finalise method at the end of the run before asking
+# for any statistics.
+
+class QueueMonitor:
+    """
+    Encapsulates online time-weighted statistics for the length of a queue
+    """
+    def __init__(self, start_time=0, max_length=100):
+        """
+        Params:
+        -------
+        start_time = time from which statistics are collected (e.g. the end of
+        the warm-up period)
+        max_length = queue length above which lengths are all counted in the
+        last bin of the histogram (used for percentiles)
+        """
+        self.start_time = start_time
+        self.max_length = max_length
+
+        self.length = 0
+        self.last_time = start_time
+        self.area = 0.0
+        self.max_seen = 0
+        # Time spent at each queue length (index = queue length)
+        self.histogram = [0.0] * (max_length + 1)
+
+    def update(self, now, length):
+        """
+        Record that the queue has changed length
+
+        Params:
+        -------
+        now = current simulation time
+        length = new length of the queue
+        """
+        if now > self.last_time:
+            elapsed = now - self.last_time
+            self.area += self.length * elapsed
+            self.histogram[min(self.length, self.max_length)] += elapsed
+            self.max_seen = max(self.max_seen, self.length)
+            self.last_time = now
+
+        if now >= self.start_time:
+            self.max_seen = max(self.max_seen, length)
+
+        self.length = length
+
+    def finalise(self, now):
+        """
+        Add on the time spent at the current length up to the end of the run
+
+        Params:
+        -------
+        now = simulation time at the end of the run
+        """
+        self.update(now, self.length)
+
+    def mean(self):
+        """
+        Returns the time-weighted mean length of the queue
+        """
+        duration = self.last_time - self.start_time
+
+        if duration <= 0:
+            return float("nan")
+
+        return self.area / duration
+
+    def percentile(self, q):
+        """
+        Returns the queue length that the queue was at or below for at least
+        proportion q of the time
+
+        Params:
+        -------
+        q = proportion of time, between 0 and 1 (e.g. 0.95)
+        """
+        duration = self.last_time - self.start_time
+
+        if duration <= 0:
+            return float("nan")
+
+        cumulative_time = 0.0
+
+        for length, time_at_length in enumerate(self.histogram):
+            cumulative_time += time_at_length
+
+            # (allowing for rounding errors in the running total)
+            if cumulative_time >= q * duration * (1 - 1e-12):
+                return length
+
+        return self.max_length
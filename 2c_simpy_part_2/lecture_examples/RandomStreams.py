@@ -0,0 +1,87 @@
+# Class that gives each part of the model its own seeded stream of random
+# numbers.  Each stream is identified by the run number and a name (e.g.
+# "arrivals", "priority", "patience", "nurse_activity", "doctor_activity").
+# Because every stream is seeded from the run number and its name, a run can
+# be repeated exactly, and two scenarios run with the same seed use the same
+# random numbers for the same things (common random numbers).  This means
+# differences between scenarios are down to the scenarios themselves rather
+# than chance, so fewer runs are needed to tell them apart.
+# To use, create an instance of the class for each run, and call the get
+# method with the name of the stream whenever a part of the model needs it.
+
+import zlib
+import numpy as np
+
+class RandomStreams:
+    """
+    Encapsulates the seeded random number streams used in a single run
+    """
+    def __init__(self, random_seed, run_number):
+        """
+        Params:
+        -------
+        random_seed = seed shared by every run in a trial.  If None, fresh
+        (unrepeatable) entropy is used.
+        run_number = number of the run the streams are for
+        """
+        self.random_seed = random_seed
+        self.run_number = run_number
+        self._streams = {}
+
+    def seed_sequence(self, name):
+        """
+        Returns the numpy SeedSequence for the named stream in this run.  This
+        can be passed as the random_seed of a Lognormal distribution.
+
+        Params:
+        -------
+        name = name of the stream
+
+        Returns:
+        -------
+        numpy.random.SeedSequence
+        """
+        # crc32 gives the same number for the same name every time Python is
+        # run (unlike hash(), which is randomised for strings)
+        return np.random.SeedSequence(
+            entropy=self.random_seed,
+            spawn_key=(self.run_number, zlib.crc32(name.encode()))
+        )
+
+    def get(self, name):
+        """
+        Returns the numpy Generator for the named stream in this run.  The
+        same Generator is returned every time the same name is asked for.
+
+        Params:
+        -------
+        name = name of the stream
+
+        Returns:
+        -------
+        numpy.random.Generator
+        """
+        if name not in self._streams:
+            self._streams[name] = np.random.default_rng(
+                self.seed_sequence(name)
+            )
+
+        return self._streams[name]
+
+    def reseed(self, run_number):
+        """
+        Switch every stream to the random numbers of a different run from now
+        on (e.g. for each run forked from a shared warm-up).  The same
+        Generator objects are kept (only their states are changed), so
+        everything that is already using them switches too.
+
+        Params:
+        -------
+        run_number = number of the run to switch the streams to
+        """
+        self.run_number = run_number
+
+        for name, stream in self._streams.items():
+            stream.bit_generator.state = np.random.default_rng(
+                self.seed_sequence(name)
+            ).bit_generator.state
@@ -0,0 +1,106 @@
+# Class for an arrival rate that changes over time (e.g. a clinic that is
+# busier in the morning than the afternoon), given as a table of rates that
+# each apply from a given time until the next one starts.  The table can
+# repeat after a fixed period (e.g. the same rates every day).
+# Arrivals at a time-varying rate (a non-homogeneous Poisson process) are
+# generated by inversion.  The number of arrivals expected by each time (the
+# cumulative rate) goes up in straight lines between the times in the table,
+# so we draw the gaps between arrivals as if the rate were always 1, add them
+# up, and then work out the time at which the cumulative rate reaches each
+# total.  Unlike thinning (drawing arrivals at the highest rate and throwing
+# some of them away), every value drawn gives an arrival, and whole blocks
+# of arrival times can be worked out at once with numpy.
+# To use, create an instance with the table of (start time, rate) pairs, and
+# pass it to an ArrivalStream as its rate_table.  For example, with 6
+# patients an hour overnight, 15 an hour from 8am and 10 an hour from 6pm,
+# repeating every day (times are in minutes) :
+#
+#   rate_table = RateTable.RateTable(
+#       [(0, 6), (480, 15), (1080, 10)], period=1440, per=60)
+
+import numpy as np
+
+class RateTable:
+    """
+    Encapsulates a piecewise constant arrival rate
+    """
+    def __init__(self, rates, period=None, per=1):
+        """
+        Params:
+        -------
+        rates = sequence of (start time, rate) pairs, in order of start time
+        and starting at time 0 - each rate applies from its start time until
+        the next one starts.  A rate can be 0 (e.g. when the clinic is
+        closed), but not every rate in a period.
+        period = time after which the table repeats, or None for the last
+        rate to carry on forever (with no more arrivals if it is 0)
+        per = length of time the rates are given per (e.g. 60 for rates per
+        hour when the times are in minutes)
+        """
+        starts = np.array([start for start, rate in rates], dtype=float)
+        rates = np.array([rate for start, rate in rates], dtype=float) / per
+
+        if len(starts) == 0 or starts[0] != 0:
+            raise ValueError("The first rate in the table must start at "
+                             + "time 0")
+        if np.any(np.diff(starts) <= 0):
+            raise ValueError("The start times in the table must go up")
+        if np.any(rates < 0):
+            raise ValueError("The rates in the table can't be negative")
+
+        if period is None:
+            ends = np.append(starts[1:], np.inf)
+        else:
+            if starts[-1] >= period:
+                raise ValueError("Every rate in the table must start before "
+                                 + "the end of the period")
+            ends = np.append(starts[1:], period)
+
+        self.starts = starts
+        self.rates = rates
+        self.period = period
+
+        # The cumulative rate at the start of each piece of the table (and,
+        # if it repeats, over the whole period)
+        self._cumulative = np.concatenate(
+            ([0], np.cumsum(rates[:-1] * np.diff(starts))))
+        if period is not None:
+            self._period_total = (self._cumulative[-1]
+                                  + rates[-1] * (period - starts[-1]))
+            if self._period_total == 0:
+                raise ValueError("The rates in the table can't all be 0")
+
+    def arrival_times(self, totals):
+        """
+        Returns the times at which the cumulative rate reaches the given
+        totals (the inverse of the cumulative rate)
+
+        Params:
+        -------
+        totals = numpy array of cumulative rates, e.g. the running total of
+        exponentially distributed values with a mean of 1
+
+        Returns:
+        -------
+        numpy array of times (inf for any totals that are never reached)
+        """
+        if self.period is None:
+            periods = 0
+        else:
+            periods, totals = np.divmod(totals, self._period_total)
+
+        # Find the piece of the table each total falls in.  Pieces with a rate
+        # of 0 don't add anything to the cumulative rate, so are skipped.
+        piece = np.searchsorted(self._cumulative, totals, "right") - 1
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            times = (self.starts[piece]
+                     + (totals - self._cumulative[piece]) / self.rates[piece])
+
+        if self.period is not None:
+            times += periods * self.period
+        else:
+            # (only past the start of the last piece, if its rate is 0)
+            times[np.isnan(times)] = np.inf
+
+        return times
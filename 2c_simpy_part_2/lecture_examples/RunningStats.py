@@ -0,0 +1,137 @@
+# Class that keeps running means and variances of a set of results (e.g. the
+# results of each run of a trial), updated one set of results at a time, so
+# that confidence intervals for the means can be checked as a trial goes on
+# without storing or re-summing every result.  To use, create an instance of
+# the class with the number of results in each set, call the update method
+# with each new set of results, and call the half_width or
+# relative_half_width methods whenever you want to know how precise the
+# means are.
+# Missing (nan) results are skipped, one result at a time - e.g. a mean
+# queuing time of nan in a run where nobody queued leaves that result's mean
+# and variance as they were, but still updates the others.  Each result keeps
+# its own count of the values it has had, and a result with fewer than 2 values
+# has an infinitely wide confidence interval.  A result with no values at all
+# has a mean of nan.
+
+import numpy as np
+import math
+from statistics import NormalDist
+
+# Function to return the p quantile of Student's t distribution with df
+# degrees of freedom (without needing scipy).  df values of 1 and 2 have exact
+# formulas.  Above that we use the Cornish-Fisher expansion around the normal
+# quantile (Abramowitz & Stegun 26.7.5), which is within 0.2% at 3 degrees of
+# freedom and much closer than that as df increases.
+def t_quantile(p, df):
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+
+    x = NormalDist().inv_cdf(p)
+
+    g1 = (x**3 + x) / 4
+    g2 = (5 * x**5 + 16 * x**3 + 3 * x) / 96
+    g3 = (3 * x**7 + 19 * x**5 + 17 * x**3 - 15 * x) / 384
+    g4 = (79 * x**9 + 776 * x**7 + 1482 * x**5 - 1920 * x**3 - 945 * x) / 92160
+
+    return x + g1 / df + g2 / df**2 + g3 / df**3 + g4 / df**4
+
+class RunningStats:
+    """
+    Encapsulates running means and variances of a set of results
+    """
+    def __init__(self, n_results):
+        """
+        Params:
+        -------
+        n_results = number of results in each set of results
+        """
+        # Number of sets of results, and number of (non-nan) values of each
+        # result
+        self.count = 0
+        self.counts = np.zeros(n_results)
+        self.mean = np.full(n_results, np.nan)
+
+        # Sum of squared differences from the mean (Welford's method, which
+        # doesn't lose precision the way summing the squares does)
+        self.sum_sq_diff = np.zeros(n_results)
+
+    def update(self, results):
+        """
+        Add a new set of results to the running means and variances
+
+        Params:
+        -------
+        results = list of results, in the same order every time
+        """
+        results = np.asarray(results, dtype="float64")
+        present = ~np.isnan(results)
+        results = results[present]
+
+        self.count += 1
+        # (a result's mean is nan until its first value)
+        self.counts[present] += 1
+        mean = np.nan_to_num(self.mean[present])
+        diff = results - mean
+        self.mean[present] = mean + diff / self.counts[present]
+        self.sum_sq_diff[present] += diff * (results - self.mean[present])
+
+    def variance(self):
+        """
+        Returns:
+        -------
+        array of the sample variance of each result (nan for results with
+        fewer than 2 values)
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = self.sum_sq_diff / (self.counts - 1)
+
+        variance[self.counts < 2] = np.nan
+
+        return variance
+
+    def half_width(self, confidence=0.95):
+        """
+        Params:
+        -------
+        confidence = confidence level of the interval (e.g. 0.95 for 95%)
+
+        Returns:
+        -------
+        array of the half width of the confidence interval for the mean of
+        each result (inf for results with fewer than 2 values)
+        """
+        p = 1 - (1 - confidence) / 2
+        t = np.array([t_quantile(p, count - 1) if count >= 2 else np.inf
+                      for count in self.counts])
+
+        with np.errstate(invalid="ignore"):
+            half_width = t * np.sqrt(self.variance() / self.counts)
+
+        half_width[self.counts < 2] = np.inf
+
+        return half_width
+
+    def relative_half_width(self, confidence=0.95):
+        """
+        Params:
+        -------
+        confidence = confidence level of the interval (e.g. 0.95 for 95%)
+
+        Returns:
+        -------
+        array of the half width of the confidence interval for the mean of
+        each result, as a proportion of the mean.  A result that is always 0
+        counts as perfectly precise (0), and any other result with a mean of
+        0 as not precise at all (inf).  A result with no values is nan.
+        """
+        half_width = self.half_width(confidence)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative = half_width / np.abs(self.mean)
+
+        relative[(self.mean == 0) & (half_width == 0)] = 0.0
+        relative[(self.mean == 0) & (half_width > 0)] = np.inf
+
+        return relative
@@ -0,0 +1,152 @@
+# Class that stores a set of parameter values for the model (a "scenario").
+# Unlike the g class, a scenario can't be changed once it has been created,
+# so several scenarios can be run at the same time (or sent off to other
+# processes to be run) without them interfering with each other.  Scenarios
+# can also be used as dictionary keys (e.g. to look up stored results for a
+# scenario).  To use, create a scenario from the g class with from_class, and
+# use the replace method to create a new scenario with some of the values
+# changed.  The values can then be read in the same way as they would be from
+# g (e.g. scenario.patient_inter).
+# Scenarios can also be loaded from a JSON, TOML or YAML file of parameter
+# names and values with from_file (YAML files need the PyYAML package).
+
+import json
+import os
+
+# Function to return the parameter names and values stored in a JSON, TOML
+# or YAML file (the type of file is worked out from its extension)
+def load_params(path):
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".json":
+        with open(path) as f:
+            params = json.load(f)
+    elif extension == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            params = tomllib.load(f)
+    elif extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Loading YAML scenario files needs the PyYAML "
+                              "package (pip install pyyaml)")
+        with open(path) as f:
+            params = yaml.safe_load(f) or {}
+    else:
+        raise ValueError(f"Unknown scenario file type {extension!r} "
+                         "(expected .json, .toml, .yaml or .yml)")
+
+    if not isinstance(params, dict):
+        raise ValueError(f"Scenario file {path} should hold parameter names "
+                         "and values")
+
+    # Scenario values have to be immutable, so store any lists (including
+    # lists inside lists, e.g. a table of arrival rates) as tuples
+    return {name: freeze(value) for name, value in params.items()}
+
+# Function to return a value loaded from a scenario file with any lists in it
+# turned into tuples
+def freeze(value):
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+
+    return value
+
+class Scenario:
+    """
+    Encapsulates an immutable, hashable set of named parameter values
+    """
+    def __init__(self, **params):
+        """
+        Params:
+        -------
+        params = parameter names and values (the values must themselves be
+        immutable, e.g. numbers, strings, None or tuples)
+        """
+        # We write straight to __dict__ because __setattr__ is blocked
+        self.__dict__.update(params)
+
+    @classmethod
+    def from_class(cls, param_class):
+        """
+        Returns a scenario holding the parameter values stored as attributes
+        of a class (e.g. the g class)
+
+        Params:
+        -------
+        param_class = class to take the parameter values from
+
+        Returns:
+        -------
+        Scenario
+        """
+        return cls(**{
+            name: value for name, value in vars(param_class).items()
+            if not name.startswith("_")
+        })
+
+    @classmethod
+    def from_file(cls, path, param_class):
+        """
+        Returns a scenario holding the parameter values stored as attributes
+        of a class (e.g. the g class), with any values given in a JSON, TOML
+        or YAML file replacing them
+
+        Params:
+        -------
+        path = path of the file to load the values from
+        param_class = class to take the rest of the parameter values from
+
+        Returns:
+        -------
+        Scenario
+        """
+        return cls.from_class(param_class).replace(**load_params(path))
+
+    def replace(self, **changes):
+        """
+        Returns a new scenario with some of the parameter values changed
+
+        Params:
+        -------
+        changes = parameter names and new values
+
+        Returns:
+        -------
+        Scenario
+        """
+        for name in changes:
+            if name not in self.__dict__:
+                raise TypeError(f"Unknown parameter : {name}")
+
+        return self.__class__(**{**self.__dict__, **changes})
+
+    def as_dict(self):
+        """
+        Returns the parameter names and values as a dictionary
+        """
+        return dict(self.__dict__)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Scenarios can't be changed - use replace to "
+                             "create a new scenario instead")
+
+    def __delattr__(self, name):
+        raise AttributeError("Scenarios can't be changed - use replace to "
+                             "create a new scenario instead")
+
+    def __eq__(self, other):
+        if not isinstance(other, Scenario):
+            return NotImplemented
+
+        return self.__dict__ == other.__dict__
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.__dict__.items())))
+
+    def __repr__(self):
+        params = ", ".join(f"{name}={value!r}"
+                           for name, value in self.__dict__.items())
+
+        return f"Scenario({params})"
@@ -0,0 +1,93 @@
+# Class for a resource (e.g. nurses) whose capacity can change during a run -
+# for example when a nurse goes on a break.  SimPy's own resources have a
+# fixed capacity, so the usual way to take a nurse away for a while is to
+# have a process request the resource with a high priority and hold it for
+# as long as the nurse is away.  That puts a "phantom" request in the queue
+# for every break, which makes every queue operation slower and means the
+# queue isn't just the patients waiting in it.  Here, taking a unit of the
+# resource out of use just lowers its capacity instead.  If every unit is busy
+# at the time, the unit goes out of use as soon as the next user releases it
+# (or, if preempt is True, the user with the lowest priority is interrupted
+# and loses it straight away).  Processes using a resource that can be
+# preempted need to catch simpy.Interrupt, in the same way as with SimPy's
+# PreemptiveResource.
+# To use, create an instance in the same way as a simpy.PriorityResource, and
+# use a ShiftSchedule to take units out of use and put them back (or call the
+# take_off and put_back methods directly).
+
+import simpy
+from simpy.resources.resource import Preempted
+
+class ScheduledResource(simpy.PriorityResource):
+    """
+    Encapsulates a priority resource whose capacity can change during a run
+    """
+    def __init__(self, env, capacity=1):
+        """
+        Params:
+        -------
+        env = SimPy environment
+        capacity = number of units of the resource when they're all in use
+        """
+        super().__init__(env, capacity)
+
+        # Events for units waiting for their user to release them before they
+        # go out of use, in the order they were taken off
+        self._going_off = []
+
+    def take_off(self, preempt=False):
+        """
+        Take a unit of the resource out of use (e.g. a nurse going on a break)
+
+        Params:
+        -------
+        preempt = if every unit is busy, whether to interrupt the user with
+        the lowest priority (who requested the resource last, if there's a
+        tie) rather than wait for a unit to be released
+
+        Returns:
+        -------
+        simpy Event that succeeds once the unit is out of use
+        """
+        if self._capacity == 0:
+            raise ValueError("Every unit of the resource is already out of "
+                             + "use")
+
+        self._capacity -= 1
+        gone_off = self._env.event()
+
+        # Units already waiting to go out of use are each still held by one
+        # of the users, so this unit is only free if there are users to
+        # spare over and above those
+        owed = self._capacity + len(self._going_off)
+
+        if len(self.users) > owed and preempt:
+            user = max(self.users, key=lambda request: request.key)
+            self.users.remove(user)
+            user.proc.interrupt(Preempted(
+                by=None, usage_since=user.usage_since, resource=self))
+
+        if len(self.users) > owed:
+            self._going_off.append(gone_off)
+        else:
+            gone_off.succeed()
+
+        return gone_off
+
+    def put_back(self):
+        """
+        Put a unit of the resource back in use (e.g. a nurse coming back from
+        a break), giving it to the next request in the queue
+        """
+        self._capacity += 1
+        self._trigger_put(None)
+
+    def _do_get(self, event):
+        # Release the unit as usual, and then let the units waiting to go out
+        # of use go, in the order they were taken off, one for each unit
+        # that is now free (the units still waiting are each held by a user)
+        super()._do_get(event)
+
+        while (self._going_off and
+               len(self.users) <= self._capacity + len(self._going_off) - 1):
+            self._going_off.pop(0).succeed()
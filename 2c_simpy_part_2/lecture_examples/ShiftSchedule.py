@@ -0,0 +1,106 @@
+# Class that sends the units of a ScheduledResource (e.g. the nurses) on
+# breaks at regular intervals.  Every frequency minutes after the last break
+# ended, one unit goes out of use for duration minutes.  If every unit is busy
+# when a break is due, the break starts once the next one is free - or
+# straight away, interrupting whoever has the lowest priority, if preempt is
+# True.  Because the breaks lower the resource's capacity rather than putting
+# requests in its queue, the queue is only ever the patients waiting in it.
+# To use, create an instance with the SimPy environment, the resource and the
+# frequency and duration of the breaks, and start its take_breaks method as
+# a process.  For example :
+#
+#   self.nurse = ScheduledResource.ScheduledResource(self.env, capacity=2)
+#   self.nurse_breaks = ShiftSchedule.ShiftSchedule(
+#       self.env, self.nurse, frequency=120, duration=15)
+#   self.env.process(self.nurse_breaks.take_breaks())
+
+class ShiftSchedule:
+    """
+    Encapsulates the regular breaks taken by the units of a resource
+    """
+    def __init__(self, env, resource, frequency, duration, preempt=False,
+                 name=None):
+        """
+        Params:
+        -------
+        env = SimPy environment
+        resource = ScheduledResource whose units take the breaks
+        frequency = time from the end of one break until the next one is due
+        duration = length of each break
+        preempt = whether a break that is due when every unit is busy
+        interrupts the user with the lowest priority (who must then handle
+        the simpy.Interrupt), rather than waiting for a unit to be free
+        name = name of the units (e.g. "nurse") to print a message about each
+        break, or None to not print anything
+        """
+        self.env = env
+        self.resource = resource
+        self.frequency = frequency
+        self.duration = duration
+        self.preempt = preempt
+        self.name = name
+
+        # When the next break is due, and when the current break will end
+        # (None if a unit isn't on one) - these are what's needed to carry on
+        # the breaks when a run is resumed from a checkpoint
+        self.next_break = None
+        self.break_end = None
+
+    def __getstate__(self):
+        # The SimPy environment and resource can't be pickled (e.g. when the
+        # schedule is saved in a checkpoint), so they have to be set again
+        # once the schedule is loaded
+        state = self.__dict__.copy()
+        state["env"] = None
+        state["resource"] = None
+
+        return state
+
+    def take_breaks(self):
+        """
+        Generator for the process that sends the units on their breaks
+        """
+        while True:
+            self.next_break = self.env.now + self.frequency
+
+            if self.name is not None:
+                print (f"The {self.name} will go on a break at around time",
+                       f"{self.next_break}")
+
+            yield self.env.timeout(self.frequency)
+
+            yield from self._take_break(self.duration)
+
+    def resume_breaks(self):
+        """
+        Generator for the process that carries on the breaks from where they
+        had got to when a run is resumed from a checkpoint - this needs to be
+        started before any processes that were using the resource
+        """
+        if self.break_end is None:
+            # Wait until the next break is due.  If it was already due, a
+            # unit was waiting to go on it until it was free, so this lets
+            # the users of the resource get it back first.
+            yield self.env.timeout(max(self.next_break - self.env.now, 0))
+            duration = self.duration
+        else:
+            duration = self.break_end - self.env.now
+
+        yield from self._take_break(duration)
+
+        yield from self.take_breaks()
+
+    def _take_break(self, duration):
+        # Take a unit out of use for the given time, once it's free
+        yield self.resource.take_off(self.preempt)
+
+        self.break_end = self.env.now + duration
+
+        if self.name is not None:
+            print (f"The {self.name} is now on a break and will be back at",
+                   f"{self.break_end}")
+
+        yield self.env.timeout(duration)
+
+        self.break_end = None
+        self.resource.put_back()
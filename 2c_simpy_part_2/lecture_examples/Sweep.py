@@ -0,0 +1,172 @@
+# Class that runs a Trial for every combination of a set of parameter values
+# (a "grid" of scenarios), spreading the trials across worker processes.  The
+# results of each trial are saved to a cache folder on disk, under a key made
+# from the scenario's parameter values (including the random seed) and the
+# code of the model.  If the same scenario is asked for again with the same
+# model code, the saved results are loaded instead of re-running the trial,
+# so adding a few new values to a grid only runs the new scenarios.
+# To use, create an instance of the class with the Trial class of the model
+# you want to run, the scenario to start from and a dictionary of the
+# parameter values to try, then call the run method.  For example :
+#
+#   from lecture_examples import Sweep, Scenario, balking_example
+#
+#   sweep = Sweep.Sweep(
+#       balking_example.Trial,
+#       Scenario.Scenario.from_class(balking_example.g),
+#       {"number_of_nurses": [1, 2, 3], "max_q_nurse": [3, 5, 10]}
+#   )
+#   sweep.run(n_workers=None)
+#   print (sweep.df_sweep_results)
+
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+# Function to run a trial for a single scenario and return its results.  It
+# sits outside of the Sweep class so that it can be sent to, and run in, a
+# separate worker process.
+def run_scenario(trial_class, scenario):
+    my_trial = trial_class(scenario, headless=True)
+    my_trial.run_trial()
+
+    return my_trial.df_trial_results
+
+class Sweep:
+    """
+    Encapsulates a grid of scenarios, each run as a trial, with the results of
+    each trial cached on disk
+    """
+    def __init__(self, trial_class, base_scenario, grid,
+                 cache_dir="sweep_cache"):
+        """
+        Params:
+        -------
+        trial_class = Trial class of the model to run
+        base_scenario = Scenario holding the values of any parameters that
+        aren't in the grid
+        grid = dictionary of parameter names and lists of values to try
+        cache_dir = folder to save trial results in
+        """
+        self.trial_class = trial_class
+        self.base_scenario = base_scenario
+        self.grid = grid
+        self.cache_dir = cache_dir
+
+        # Store the trial results for each scenario once the sweep has run
+        self.trial_results = {}
+
+    def scenarios(self):
+        """
+        Returns a list of scenarios, one for each combination of the
+        parameter values in the grid
+        """
+        names = list(self.grid)
+
+        return [
+            self.base_scenario.replace(**dict(zip(names, values)))
+            for values in itertools.product(*self.grid.values())
+        ]
+
+    def code_version(self):
+        """
+        Returns a hash of the code of the model - the module the Trial class
+        is in, plus any of our modules it imports from the same folder
+        """
+        module = sys.modules[self.trial_class.__module__]
+        folder = os.path.dirname(os.path.abspath(module.__file__))
+
+        files = {os.path.abspath(module.__file__)}
+
+        for value in vars(module).values():
+            file = getattr(value, "__file__", None)
+
+            if (file is not None and
+                os.path.dirname(os.path.abspath(file)) == folder):
+                files.add(os.path.abspath(file))
+
+        code_hash = hashlib.sha256()
+
+        for file in sorted(files):
+            with open(file, "rb") as f:
+                code_hash.update(f.read())
+
+        return code_hash.hexdigest()
+
+    def cache_key(self, scenario, code_version):
+        """
+        Returns the key that the results of a scenario are saved under
+
+        Params:
+        -------
+        scenario = Scenario to get the key for
+        code_version = hash of the model code (from code_version)
+        """
+        key = json.dumps({
+            "trial": (f"{self.trial_class.__module__}."
+                      f"{self.trial_class.__qualname__}"),
+            "scenario": scenario.as_dict(),
+            "code": code_version
+        }, sort_keys=True, default=repr)
+
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def run(self, n_workers=1):
+        """
+        Run a trial for every scenario in the grid that doesn't already have
+        results saved in the cache, and store the results of every scenario
+
+        Params:
+        -------
+        n_workers = number of worker processes to spread the trials across
+        (None uses every core)
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        code_version = self.code_version()
+        cache_files = {}
+        to_run = []
+
+        for scenario in self.scenarios():
+            cache_file = os.path.join(
+                self.cache_dir, f"{self.cache_key(scenario, code_version)}.pkl"
+            )
+            cache_files[scenario] = cache_file
+
+            if os.path.exists(cache_file):
+                self.trial_results[scenario] = pd.read_pickle(cache_file)
+            else:
+                to_run.append(scenario)
+
+        if n_workers == 1:
+            new_results = [run_scenario(self.trial_class, scenario)
+                           for scenario in to_run]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                new_results = list(pool.map(run_scenario,
+                                            [self.trial_class] * len(to_run),
+                                            to_run))
+
+        for scenario, results in zip(to_run, new_results):
+            results.to_pickle(cache_files[scenario])
+            self.trial_results[scenario] = results
+
+        self.calculate_sweep_results()
+
+    def calculate_sweep_results(self):
+        """
+        Store a DataFrame with a row for each scenario in the grid, giving the
+        parameter values and the mean of each trial result across the runs
+        """
+        rows = []
+
+        for scenario in self.scenarios():
+            row = {name: getattr(scenario, name) for name in self.grid}
+            row.update(self.trial_results[scenario].mean().to_dict())
+            rows.append(row)
+
+        self.df_sweep_results = pd.DataFrame(rows)
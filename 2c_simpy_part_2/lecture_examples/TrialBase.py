@@ -0,0 +1,228 @@
+# Class holding the ways of running a Trial that are the same in every
+# example - all the runs at once (optionally spread across worker processes),
+# forked from a single shared warm-up, written straight into a TrialStore
+# file, or sequentially until the results are precise enough.  Each
+# example's Trial inherits from it, and gives the Model class to run as
+# model_class.  The Trial must also have scenario, headless and
+# df_trial_results attributes, and calculate_means_over_trial and
+# print_trial_results methods.  For example :
+#
+#   class Trial(TrialBase.TrialBase):
+#       model_class = Model
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+if __package__:
+    from . import RunningStats
+    from . import TrialStore
+    from . import WarmUpFork
+else:
+    import RunningStats
+    import TrialStore
+    import WarmUpFork
+
+# Function to run a single run of a model and return the results from that
+# run.  It sits outside of the Trial class so that it can be sent to, and run
+# in, a separate worker process (along with the scenario to run).
+def run_replication(model_class, run_number, scenario, headless=False):
+    my_model = model_class(run_number, scenario, headless)
+    my_model.run()
+
+    return my_model.replication_results()
+
+class TrialBase:
+    """
+    Encapsulates the ways of running the runs of a trial
+    """
+    # Model class to run in each run of the trial
+    model_class = None
+
+    def run_replications(self, runs, pool=None):
+        """
+        Run the given runs of the model and store their results
+
+        Params:
+        -------
+        runs = run numbers to run
+        pool = pool of worker processes to spread the runs across, or None to
+        run them in this process
+
+        Returns:
+        -------
+        list of the results of each run
+        """
+        replication = partial(run_replication, self.model_class,
+                              scenario=self.scenario, headless=self.headless)
+
+        if pool is None:
+            run_results = list(map(replication, runs))
+        else:
+            run_results = list(pool.map(replication, runs))
+
+        for run, results in zip(runs, run_results):
+            self.df_trial_results.loc[run] = results
+
+        return run_results
+
+    def run_trial(self, n_workers=1):
+        """
+        Run the trial.  Each run draws from its own seeded random number
+        streams, so the results are exactly the same however many workers
+        are used.
+
+        Params:
+        -------
+        n_workers = number of worker processes to spread the runs across
+        (None uses every core)
+        """
+        runs = range(self.scenario.number_of_runs)
+
+        if n_workers == 1:
+            self.run_replications(runs)
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                self.run_replications(runs, pool)
+
+        self.calculate_means_over_trial()
+
+        if not self.headless:
+            self.print_trial_results()
+
+    def run_trial_forked(self, n_workers=1):
+        """
+        Run the trial, with the warm-up period only run once.  The model is
+        run to the end of the warm-up, and each run of the trial is then
+        forked (as a separate process) from that point, with its own random
+        numbers from then on.  This saves re-running the warm-up for every
+        run, but means the runs all start from the same state after the
+        warm-up.  Forking needs an operating system that supports it (e.g.
+        Linux or macOS, but not Windows).
+
+        Params:
+        -------
+        n_workers = most forked runs to run at the same time
+        """
+        runs = range(self.scenario.number_of_runs)
+
+        warm_up_fork = WarmUpFork.WarmUpFork(
+            self.model_class(WarmUpFork.SHARED_WARM_UP_RUN, self.scenario,
+                             self.headless)
+        )
+        warm_up_fork.warm_up()
+        run_results = warm_up_fork.run(
+            runs, self.model_class.replication_results, n_workers)
+
+        for run, results in zip(runs, run_results):
+            self.df_trial_results.loc[run] = results
+
+        self.calculate_means_over_trial()
+
+        if not self.headless:
+            self.print_trial_results()
+
+    def run_trial_to_store(self, path, n_workers=1):
+        """
+        Run the trial, with each run writing its results straight into a
+        memory-mapped TrialStore file, instead of sending them back to this
+        process.  This is useful for trials with very large numbers of runs,
+        and the file can be opened again later for analysis.
+
+        Params:
+        -------
+        path = path of the TrialStore file to create
+        n_workers = number of worker processes to spread the runs across
+        (None uses every core)
+        """
+        runs = range(self.scenario.number_of_runs)
+
+        self.trial_store = TrialStore.TrialStore.create(
+            path, self.df_trial_results.dtypes.astype(str).to_dict(),
+            len(runs))
+
+        replication = partial(run_replication, self.model_class,
+                              scenario=self.scenario, headless=self.headless)
+        store_run = partial(TrialStore.run_into_store,
+                            replication=replication, path=path)
+
+        if n_workers == 1:
+            for run in runs:
+                store_run(run)
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                list(pool.map(store_run, runs))
+
+        self.df_trial_results = self.trial_store.to_dataframe()
+
+        self.calculate_means_over_trial()
+
+        if not self.headless:
+            self.print_trial_results()
+
+    def run_trial_sequential(self, precision=0.05, confidence=0.95,
+                             batch_size=10, max_runs=1000, n_workers=1):
+        """
+        Run the trial sequentially - rather than a fixed number of runs,
+        runs are done in batches until the confidence interval for the mean
+        of every trial result (that has had any values) is within the given
+        precision, or until max_runs runs have been done
+
+        Params:
+        -------
+        precision = widest half width of the confidence intervals allowed,
+        as a proportion of the mean
+        confidence = confidence level of the intervals (e.g. 0.95 for 95%)
+        batch_size = number of runs to do between checks of the intervals
+        max_runs = most runs to do
+        n_workers = number of worker processes to spread the runs across
+        (None uses every core)
+        """
+        stats = RunningStats.RunningStats(len(self.df_trial_results.columns))
+
+        if n_workers == 1:
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=n_workers)
+
+        try:
+            while stats.count < max_runs:
+                runs = range(stats.count,
+                             min(stats.count + batch_size, max_runs))
+
+                for results in self.run_replications(runs, pool):
+                    stats.update(results)
+
+                # (results with no values yet, e.g. a mean queuing time of
+                # nan in every run where nobody queued, can't get any more
+                # precise, so they don't hold up stopping)
+                relative = stats.relative_half_width(confidence)
+
+                if (stats.count > 1 and
+                    (relative[stats.counts > 0] <= precision).all()):
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # Store the number of runs done, and the half width of the confidence
+        # interval for the mean of each trial result
+        self.runs_done = stats.count
+        self.half_widths = dict(zip(self.df_trial_results.columns,
+                                    stats.half_width(confidence)))
+
+        # Store the trial results that had no values in any run
+        self.results_without_values = list(
+            self.df_trial_results.columns[stats.counts == 0])
+
+        self.calculate_means_over_trial()
+
+        if not self.headless:
+            self.print_trial_results()
+
+            print (f"Stopped after {self.runs_done} runs")
+            for column, half_width in self.half_widths.items():
+                if column in self.results_without_values:
+                    print (f"{column} : no values in any run")
+                else:
+                    print (f"{column} : +/- {half_width:.2f}",
+                           f"({confidence:.0%} confidence interval)")
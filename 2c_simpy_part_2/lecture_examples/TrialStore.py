@@ -0,0 +1,119 @@
+# Class that stores the results of every run of a trial in a numpy
+# structured array saved on disk (as a .npy file) and memory-mapped, rather
+# than in a DataFrame in memory.  The file is created once, with a row (or
+# "slot") for every run, so it never has to grow.  Each run writes its
+# results straight into its own slot - including runs in worker processes,
+# which open the same file - so the results don't have to be sent back to
+# the main process.  Once the trial is done, the file can be opened again
+# (by this or any later program) and read without copying it into memory.
+# To use, create the file with the create method, giving the names and types
+# of the results and the number of runs, and call the write method with the
+# results of each run.  Open an existing file by creating an instance of the
+# class with its path, and call the to_dataframe method (or use the array
+# attribute directly) to look at the results (pandas is only imported when
+# to_dataframe is called).
+
+import numpy as np
+
+# Function to do a single run and write its results into the store in the
+# given file.  It sits outside of the TrialStore class so that it can be sent
+# to, and run in, a separate worker process (along with the function that
+# does the run).
+def run_into_store(run_number, replication, path):
+    results = replication(run_number)
+
+    store = TrialStore(path, mode="r+")
+    store.write(run_number, results)
+
+class TrialStore:
+    """
+    Encapsulates the results of a trial's runs, stored in a memory-mapped
+    numpy structured array on disk
+    """
+    def __init__(self, path, mode="r"):
+        """
+        Params:
+        -------
+        path = path of an existing store file
+        mode = "r" to only read the results, "r+" to also write results
+        """
+        self.path = path
+        self.array = np.load(path, mmap_mode=mode)
+
+        # Names of the results (every field apart from the one that records
+        # which runs have been written)
+        self.columns = [name for name in self.array.dtype.names
+                        if name != "Done"]
+
+    @classmethod
+    def create(cls, path, columns, n_runs):
+        """
+        Create a new store file (replacing any file already at the path),
+        with an empty slot for each run
+
+        Params:
+        -------
+        path = path of the file to create (should end in .npy)
+        columns = dictionary of result names and numpy types, in the order
+        the results will be passed to write
+        n_runs = number of runs in the trial
+
+        Returns:
+        -------
+        TrialStore, opened for writing
+        """
+        dtype = list(columns.items()) + [("Done", "bool")]
+
+        array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype,
+                                          shape=(n_runs,))
+        array["Done"] = False
+        array.flush()
+        del array
+
+        return cls(path, mode="r+")
+
+    def __len__(self):
+        return len(self.array)
+
+    def write(self, run_number, results):
+        """
+        Write the results of a run into its slot
+
+        Params:
+        -------
+        run_number = run number of the run (its slot in the store)
+        results = list of results, in the same order as the columns
+        """
+        self.array[run_number] = (*results, True)
+
+    def flush(self):
+        """
+        Make sure everything written so far is saved to the file
+        """
+        self.array.flush()
+
+    def completed_runs(self):
+        """
+        Returns:
+        -------
+        array of the run numbers that have had their results written
+        """
+        return np.flatnonzero(self.array["Done"])
+
+    def to_dataframe(self):
+        """
+        Returns the results of the runs written so far as a pandas DataFrame
+
+        Returns:
+        -------
+        pandas.DataFrame, indexed by Run Number
+        """
+        import pandas as pd
+
+        runs = self.completed_runs()
+
+        df = pd.DataFrame({name: self.array[name][runs]
+                           for name in self.columns},
+                          index=pd.Index(runs, name="Run Number"))
+
+        return df
@@ -0,0 +1,152 @@
+# Class that estimates how long a warm-up period a model needs, using the
+# MSER-5 method.  A few pilot runs of the model are done with no warm-up
+# period, and the queuing times recorded in each are put in time order and
+# averaged across the runs.  The averaged series is split into batches of 5
+# patients, and the warm-up is cut off at the batch that minimises the
+# "marginal standard error" of the rest of the series - the point after
+# which the results are most settled, allowing for how many results are left.
+# To use, create an instance of the class with the Model class and scenario
+# you want to run, call the run method, and then pass the scenario returned
+# by the scenario method (which has the estimated warm-up period in it) to
+# your Model or Trial.  For example :
+#
+#   from lecture_examples import WarmUp, Scenario, warm_up_example
+#
+#   warm_up = WarmUp.WarmUp(
+#       warm_up_example.Model,
+#       Scenario.Scenario.from_class(warm_up_example.g)
+#   )
+#   warm_up.run()
+#   my_trial = warm_up_example.Trial(warm_up.scenario())
+#   my_trial.run_trial()
+# Patients without a result in the column (e.g. doctor patients in a model
+# with a separate doctor queue) are left out.  If the cut off lands at the
+# end of the first half of the series, the pilot runs are probably too short
+# to settle down, and a warning is given.
+
+import warnings
+import numpy as np
+
+# Run number that the pilot runs start from.  The pilot runs use their own
+# random number streams, well away from the run numbers used by a Trial, so
+# the warm-up isn't chosen using the same random numbers it's applied to.
+PILOT_RUN_OFFSET = 1_000_000
+
+class WarmUp:
+    """
+    Encapsulates an MSER-5 estimate of the warm-up period of a model
+    """
+    def __init__(self, model_class, scenario, n_pilot_runs=5,
+                 column="Q Time Nurse", batch_size=5):
+        """
+        Params:
+        -------
+        model_class = Model class of the model to run
+        scenario = Scenario to run.  The pilot runs last for its
+        sim_duration plus warm_up_period.
+        n_pilot_runs = number of pilot runs to average the results across
+        column = column of the model's results_df to look at
+        batch_size = number of results in each batch (5 for MSER-5)
+        """
+        self.model_class = model_class
+        self.base_scenario = scenario
+        self.n_pilot_runs = n_pilot_runs
+        self.column = column
+        self.batch_size = batch_size
+
+    def run(self):
+        """
+        Do the pilot runs and store the estimated warm-up period
+        """
+        pilot_scenario = self.base_scenario.replace(
+            sim_duration=(self.base_scenario.sim_duration +
+                          self.base_scenario.warm_up_period),
+            warm_up_period=0
+        )
+
+        times = []
+        values = []
+
+        for run in range(self.n_pilot_runs):
+            my_model = self.model_class(PILOT_RUN_OFFSET + run,
+                                        pilot_scenario, headless=True)
+            my_model.run()
+
+            results_df = my_model.results_df.dropna(
+                subset=[self.column]).sort_values("Time")
+            times.append(results_df["Time"].to_numpy())
+            values.append(results_df[self.column].to_numpy())
+
+        # Average the series across the pilot runs, patient by patient (only
+        # as far as the shortest run goes)
+        n = min(len(series) for series in values)
+        n_batches = n // self.batch_size
+
+        if n_batches < 2:
+            raise ValueError(
+                f"The shortest pilot run only has {n} results in "
+                + f"{self.column} - at least {2 * self.batch_size} are "
+                + "needed to estimate the warm-up period"
+            )
+
+        n = n_batches * self.batch_size
+
+        mean_times = np.mean([series[:n] for series in times], axis=0)
+        mean_values = np.mean([series[:n] for series in values], axis=0)
+
+        batch_means = mean_values.reshape(n_batches,
+                                          self.batch_size).mean(axis=1)
+
+        self.mser = self.calculate_mser(batch_means)
+
+        # Only look for the cut off in the first half of the series, as the
+        # MSER statistic is unreliable once there are few batches left
+        self.truncated_batches = int(
+            np.argmin(self.mser[:n_batches // 2 + 1]))
+
+        if self.truncated_batches == n_batches // 2:
+            warnings.warn(
+                "The warm-up period was cut off at the end of the first half "
+                + "of the pilot runs, so they are probably too short for the "
+                + "results to settle down - try a longer sim_duration"
+            )
+
+        # The warm-up period is the (average) time at which the first result
+        # after the cut off was recorded
+        if self.truncated_batches == 0:
+            self.warm_up_period = 0.0
+        else:
+            self.warm_up_period = float(
+                mean_times[self.truncated_batches * self.batch_size])
+
+    def calculate_mser(self, batch_means):
+        """
+        Params:
+        -------
+        batch_means = array of batch means, in time order
+
+        Returns:
+        -------
+        array of the MSER statistic for cutting off each possible number of
+        batches (0 up to all but one)
+        """
+        m = len(batch_means)
+        remaining = np.arange(m, 0, -1)
+
+        # Sums (and sums of squares) of the batch means from each batch to the
+        # end of the series
+        tail_sum = np.cumsum(batch_means[::-1])[::-1]
+        tail_sum_sq = np.cumsum(batch_means[::-1] ** 2)[::-1]
+
+        sum_sq_diff = tail_sum_sq - tail_sum ** 2 / remaining
+
+        return sum_sq_diff / remaining ** 2
+
+    def scenario(self):
+        """
+        Returns:
+        -------
+        the scenario passed in, with the warm_up_period replaced by the
+        estimated warm-up period (run must have been called first)
+        """
+        return self.base_scenario.replace(warm_up_period=self.warm_up_period)
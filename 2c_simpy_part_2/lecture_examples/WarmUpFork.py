@@ -0,0 +1,149 @@
+# Class that runs the warm-up period of a model once, and then forks the
+# rest of each run of a trial from the end of that warm-up.  When the
+# warm-up is long compared to the time results are collected for, most of
+# the time taken by a trial is spent re-running warm-ups that get thrown
+# away, so running it once and starting every run from the state at the end
+# of it saves most of that time.
+# SimPy processes are Python generators, which can't be copied or pickled,
+# so the state at the end of the warm-up is captured by forking the whole
+# process (each run is carried on in a child process that starts off as an
+# exact copy of this one).  This means it only works on operating systems
+# that can fork (e.g. Linux or macOS, but not Windows).  After the fork,
+# each run switches its random number streams to the streams for its own
+# run number, so the runs differ from each other from the end of the warm-up
+# onwards.  Note that the runs are not independent in the way separate runs
+# are, as they all share the same state at the end of the warm-up - that
+# state is just one sample of what it could have been.
+# The model needs start, finish and fork methods (see ModelBase).
+# To use, create an instance of the class with a Model for the shared
+# warm-up, call the warm_up method, and then call the run method with the
+# run numbers to run and a function that gets the results from a finished
+# Model.  For example :
+#
+#   from lecture_examples import WarmUpFork, reneging_example
+#
+#   warm_up_fork = WarmUpFork.WarmUpFork(
+#       reneging_example.Model(WarmUpFork.SHARED_WARM_UP_RUN, headless=True)
+#   )
+#   warm_up_fork.warm_up()
+#   results = warm_up_fork.run(range(100),
+#                              reneging_example.Model.replication_results)
+
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+
+# Run number used for the random number streams of the shared warm-up, so
+# they're different to the streams each forked run switches to afterwards.
+SHARED_WARM_UP_RUN = 2_000_000
+
+def _run_fork(model, run_number, results_function, connection):
+    # Carry on the run in the child process, and send its results back
+    model.fork(run_number)
+    model.finish()
+    connection.send(results_function(model))
+    connection.close()
+
+class WarmUpFork:
+    """
+    Encapsulates a warm-up period shared by many runs of a model
+    """
+    def __init__(self, model):
+        """
+        Params:
+        -------
+        model = Model to run the shared warm-up in.  This must not be
+        writing patient level results to a PatientSink or saving
+        checkpoints, as every run would write to the same files.
+        """
+        if model.patient_sink is not None:
+            raise ValueError(
+                "Runs forked from a shared warm-up can't write patient " +
+                "level results to a PatientSink"
+            )
+
+        if model.checkpoint is not None:
+            raise ValueError(
+                "Runs forked from a shared warm-up can't be checkpointed"
+            )
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise ValueError(
+                "Forking runs from a shared warm-up needs an operating " +
+                "system that can fork processes"
+            )
+
+        self.model = model
+        self.warmed_up = False
+
+    def warm_up(self):
+        """
+        Start the model and run it to the end of its warm-up period
+        """
+        self.model.start()
+
+        # SimPy can't be run until time 0, so there's nothing more to do if
+        # there isn't a warm-up period
+        if self.model.scenario.warm_up_period > 0:
+            self.model.env.run(until=self.model.scenario.warm_up_period)
+
+        self.warmed_up = True
+
+    def run(self, run_numbers, results_function, n_workers=1):
+        """
+        Fork a run of the model from the end of the warm-up for each run
+        number, and return the results of each
+
+        Params:
+        -------
+        run_numbers = run numbers of the runs to fork
+        results_function = function that takes a finished Model and
+        returns its results (these must be able to be pickled)
+        n_workers = maximum number of runs to carry on at once.  If None,
+        the number of CPUs is used.
+
+        Returns:
+        -------
+        list of the results of each run, in the order of run_numbers
+        """
+        if not self.warmed_up:
+            self.warm_up()
+
+        context = multiprocessing.get_context("fork")
+        n_workers = n_workers or os.cpu_count()
+        run_numbers = list(run_numbers)
+        results = [None] * len(run_numbers)
+
+        # Connection to each running fork, mapped to its index in
+        # run_numbers and its process
+        running = {}
+        next_run = 0
+
+        while next_run < len(run_numbers) or running:
+            # Start forks until n_workers are running (or none are left)
+            while next_run < len(run_numbers) and len(running) < n_workers:
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_run_fork,
+                    args=(self.model, run_numbers[next_run],
+                          results_function, sender)
+                )
+                process.start()
+                sender.close()
+                running[receiver] = (next_run, process)
+                next_run += 1
+
+            # Collect the results of whichever forks have finished
+            for receiver in wait(list(running)):
+                index, process = running.pop(receiver)
+                try:
+                    results[index] = receiver.recv()
+                except EOFError:
+                    raise RuntimeError(
+                        f"Forked run {run_numbers[index]} failed"
+                    ) from None
+                finally:
+                    receiver.close()
+                    process.join()
+
+        return results
@@ -0,0 +1,23 @@
+# The lecture examples as a package, so the models (and the classes they use)
+# can be imported from other code - for example :
+#
+#   from lecture_examples import reneging_example
+#
+#   my_trial = reneging_example.Trial(headless=True)
+#   my_trial.run_trial()
+#
+# Nothing is imported until it's asked for, so importing the package (or
+# one of the examples) doesn't import pandas or matplotlib.  To run a trial
+# of an example from the command line, see __main__.py.
+
+# The example models in the package
+EXAMPLES = [
+    "warm_up_example",
+    "logn_example",
+    "priorityresource_example",
+    "resource_unav_example",
+    "reneging_example",
+    "balking_example",
+    "balking_example_with_graph",
+    "choose_queue_example"
+]
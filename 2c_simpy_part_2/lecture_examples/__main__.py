@@ -0,0 +1,94 @@
+# Entry point for running a trial of one of the examples from the command
+# line.  Run from the folder above this one with, for example :
+#
+#   python -m lecture_examples reneging_example
+#   python -m lecture_examples reneging_example --scenario my_scenario.toml \
+#       --workers 0 --seed 123 --output results/my_scenario
+#
+# The scenario file (JSON, TOML or YAML) holds the parameter values to use
+# instead of those in the example's g class, e.g. in TOML :
+#
+#   number_of_nurses = 2
+#   patient_inter = 4
+#   number_of_runs = 50
+#
+# --workers 0 spreads the runs across every core.  If an output folder is
+# given, the results of each run are saved to trial_results.csv, the means
+# across the runs (and the scenario used) to summary.json, and the results
+# of every patient to the patients folder as Parquet files (this needs the
+# pyarrow package - use --no-patient-output to skip it).
+
+import argparse
+import importlib
+import json
+import os
+from . import EXAMPLES
+from . import Scenario
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m lecture_examples",
+        description="Run a trial of one of the example clinic models")
+    parser.add_argument("example", choices=EXAMPLES,
+                        help="example model to run")
+    parser.add_argument("--scenario",
+                        help="JSON, TOML or YAML file of parameter values")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes to spread the runs "
+                             "across (0 uses every core)")
+    parser.add_argument("--seed", type=int,
+                        help="seed for the random number streams (replaces "
+                             "the scenario's random_seed)")
+    parser.add_argument("--output",
+                        help="folder to save the results to (if not given, "
+                             "the results are only printed)")
+    parser.add_argument("--no-patient-output", action="store_true",
+                        help="don't save the results of every patient")
+    args = parser.parse_args(args)
+
+    module = importlib.import_module(f".{args.example}", __package__)
+
+    if args.scenario is None:
+        scenario = Scenario.Scenario.from_class(module.g)
+    else:
+        try:
+            scenario = Scenario.Scenario.from_file(args.scenario, module.g)
+        except (OSError, TypeError, ValueError, ImportError) as e:
+            parser.error(f"couldn't load scenario file : {e}")
+
+    if args.seed is not None:
+        scenario = scenario.replace(random_seed=args.seed)
+
+    if args.output is None:
+        # Print the results of every run, as running the example would
+        my_trial = module.Trial(scenario)
+        my_trial.run_trial(n_workers=args.workers or None)
+        return
+
+    os.makedirs(args.output, exist_ok=True)
+
+    if not args.no_patient_output:
+        scenario = scenario.replace(
+            patient_sink_dir=os.path.join(args.output, "patients"))
+
+    my_trial = module.Trial(scenario, headless=True)
+    my_trial.run_trial(n_workers=args.workers or None)
+
+    my_trial.df_trial_results.to_csv(
+        os.path.join(args.output, "trial_results.csv"))
+
+    summary = {
+        "example": args.example,
+        "scenario": scenario.as_dict(),
+        "means": my_trial.df_trial_results.mean().to_dict()
+    }
+
+    with open(os.path.join(args.output, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=4)
+
+    print ("Means across runs")
+    for column, mean in summary["means"].items():
+        print (f"  {column} : {mean:.2f}")
+
+if __name__ == "__main__":
+    main()
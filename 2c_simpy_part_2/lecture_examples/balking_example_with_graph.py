@@ -1,13 +1,55 @@
 import simpy
-import random
-import pandas as pd
-import Lognormal
-import matplotlib.pyplot as plt ##NEW - import matplotlib for graphs
-
-# Class to store global parameter values.
+from functools import cached_property
+# Import the other modules in this folder - from the lecture_examples package
+# if this file has been imported as part of it (or run with python -m), or
+# from the same folder as this file if it's been run directly as a script.
+# pandas and matplotlib are only imported when they're needed, so that
+# importing this file (e.g. in every worker process of a trial) is quick.
+if __package__:
+    from . import Lognormal
+    from . import RandomStreams
+    from . import ArrivalStream
+    from . import Scenario
+    from . import EventLog
+    from . import PatientSink
+    from . import Checkpoint
+    from . import ModelBase
+    from . import TrialBase
+    from . import ScheduledResource
+    from . import ShiftSchedule
+    from . import RateTable
+    from . import QueueMonitor
+    from . import PatientQueue
+else:
+    import Lognormal
+    import RandomStreams
+    import ArrivalStream
+    import Scenario
+    import EventLog
+    import PatientSink
+    import Checkpoint
+    import ModelBase
+    import TrialBase
+    import ScheduledResource
+    import ShiftSchedule
+    import RateTable
+    import QueueMonitor
+    import PatientQueue
+
+# Class to store global parameter values.  These are the default values
+# for the model - a Scenario is created from them unless a different scenario
+# is passed in to the Model or Trial.
 class g:
     # Inter-arrival times
     patient_inter = 5
+    # Time-varying arrival rate - None for patients to arrive at the same
+    # rate all the time, or (start time, patients per hour) pairs giving
+    # the rate from each time (in minutes from the start of the run,
+    # including any warm-up) until the next.  The rates repeat every
+    # arrival_rate_period minutes (None for the last rate to carry on to
+    # the end of the run).
+    arrival_rates = None
+    arrival_rate_period = 1440
 
     # Activity times
     mean_n_consult_time = 6
@@ -27,37 +69,175 @@ class g:
     sim_duration = 2880
     number_of_runs = 1 ##NEW - updated to 1 run so we can easily see results
     warm_up_period = 1440
+
+    # Whether to store every change in queue length so the queues can be
+    # printed and plotted after the run.  Summary statistics about the queue
+    # lengths are calculated either way, so this can be switched off for long
+    # runs where we only need those.
+    record_queue_trace = True
+
+    # Seed for the random number streams used in every run (set to None to
+    # get different random numbers each time the trial is run)
+    random_seed = 42
+
+    # Folder to stream patient-level results to as the model runs (as
+    # Parquet files, one folder per run), or None to not save them
+    patient_sink_dir = None
+
+    # Folder to save checkpoints of each run to as it goes (so a run that's
+    # stopped part way through can be carried on from its last checkpoint),
+    # or None to not save them, and the simulated time between checkpoints
+    checkpoint_dir = None
+    checkpoint_interval = 1440
    
-# Class representing patients coming in to the clinic.
+# Class representing patients coming in to the clinic.  Their randomly sampled
+# attributes are drawn by the model's ArrivalStream and passed in.
 class Patient:
-    def __init__(self, p_id):
+    # Patients only have the attributes listed here, which lets Python store
+    # them in fixed slots rather than a dictionary for every patient - a lot
+    # less memory when there are millions of patients in a trial
+    __slots__ = ("id", "q_time_nurse", "priority", "patience_nurse",
+                 "start_q_nurse", "nurse_consult_end")
+
+    def __init__(self, p_id, priority, patience_nurse):
         self.id = p_id
         self.q_time_nurse = 0
-        self.priority = random.randint(1,5)
-        self.patience_nurse = random.randint(5, 50)
+        self.priority = priority
+        self.patience_nurse = patience_nurse
+
+        # When the patient started queuing for the nurse, and when their
+        # consultation with the nurse will end (None until they happen)
+        self.start_q_nurse = None
+        self.nurse_consult_end = None
 
 # Class representing our model of the clinic.
-class Model:
+class Model(ModelBase.ModelBase):
+    # Attributes that draw random numbers in blocks, whose blocks are
+    # thrown away when the run is forked
+    buffered_attributes = (
+        "arrivals",
+        "nurse_consult_time_dist"
+    )
+
+    # Attributes saved in a checkpoint of the run, as well as those that
+    # every model has
+    checkpoint_attributes = ModelBase.ModelBase.checkpoint_attributes + (
+        "nurse_consult_time_dist",
+        "num_reneged_nurse",
+        "num_balked_nurse",
+        "q_nurse_monitor",
+        "q_for_nurse_consult",
+        "queue_log",
+        "nurse_breaks"
+    )
+
     # Constructor
-    def __init__(self, run_number):
+    def __init__(self, run_number, scenario=None, headless=False,
+                 profiler=None):
+        # Set the parameter values to use for this run (the values in the g
+        # class, unless a different scenario has been passed in)
+        if scenario is None:
+            scenario = Scenario.Scenario.from_class(g)
+        self.scenario = scenario
+
         # Set up SimPy environment
         self.env = simpy.Environment()
 
+        # Set up the random number streams for this run
+        self.streams = RandomStreams.RandomStreams(self.scenario.random_seed,
+                                                   run_number)
+
+        # Set up the time-varying arrival rate, if the scenario gives one
+        if self.scenario.arrival_rates is None:
+            rate_table = None
+        else:
+            rate_table = RateTable.RateTable(
+                self.scenario.arrival_rates,
+                self.scenario.arrival_rate_period, per=60)
+
+        # Set up the stream of arrivals.  Inter-arrival times and patient
+        # attributes are drawn from numpy in blocks of 1000, which is much
+        # quicker than drawing them one patient at a time.
+        self.arrivals = ArrivalStream.ArrivalStream(
+            self.streams.get("arrivals"), self.scenario.patient_inter, {
+                "priority": (self.streams.get("priority"), 1, 5),
+                "patience_nurse": (self.streams.get("patience"), 5, 50)
+            }, rate_table=rate_table)
+
         # Set up counters to use as entity IDs
         self.patient_counter = 0
 
         # Set up resources
-        self.nurse = simpy.PriorityResource(self.env, 
-                                            capacity=g.number_of_nurses)
+        self.nurse = ScheduledResource.ScheduledResource(
+            self.env, capacity=self.scenario.number_of_nurses)
+
+        # Set up the nurse's breaks - every unav_freq_nurse minutes, a
+        # nurse goes on a break for unav_time_nurse minutes once they've
+        # finished with their current patient
+        self.nurse_breaks = ShiftSchedule.ShiftSchedule(
+            self.env, self.nurse, self.scenario.unav_freq_nurse,
+            self.scenario.unav_time_nurse)
+
+        # Set up the lognormal distribution for nurse consultation times.  We
+        # create it once per run and draw samples in blocks of 1000, which is
+        # much quicker than creating a new instance for every patient.
+        self.nurse_consult_time_dist = Lognormal.Lognormal(
+            self.scenario.mean_n_consult_time,
+            self.scenario.sd_n_consult_time,
+            block_size=1000,
+            random_seed=self.streams.get("nurse_activity"))
 
         # Set run number from value passed in
         self.run_number = run_number
 
-        # Set up DataFrame to store patient-level results
-        self.results_df = pd.DataFrame()
-        self.results_df["Patient ID"] = [1]
-        self.results_df["Q Time Nurse"] = [0.0]
-        self.results_df.set_index("Patient ID", inplace=True)
+        # Set whether to run without printing or plotting anything (the
+        # results are still stored in the model's attributes either way)
+        self.headless = headless
+
+        # Set the profiler to record event counts and timings for the run
+        # (None to not profile the run)
+        self.profiler = profiler
+
+        # Set up a log to store patient-level results.  Results are added to
+        # typed numpy columns during the run, and only turned into a DataFrame
+        # (results_df) if it's asked for once the run is over.
+        self.results_log = EventLog.EventLog({
+            "Patient ID": "int64",
+            "Time": "float64",
+            "Q Time Nurse": "float64"
+        })
+
+        # Set up a sink to stream patient-level results to disk during the
+        # run, if a folder has been given for them in the scenario
+        if self.scenario.patient_sink_dir is None:
+            self.patient_sink = None
+        else:
+            self.patient_sink = PatientSink.PatientSink(
+                self.scenario.patient_sink_dir, {
+                    "Run Number": "int64",
+                    "Patient ID": "int64",
+                    "Arrival Time": "float64",
+                    "Priority": "int64",
+                    "Q Time Nurse": "float64",
+                    "Reneged": "bool",
+                    "Balked": "bool"
+                }, run_number)
+
+        # Set up checkpoints of the run to be saved as it goes, if a folder
+        # has been given for them in the scenario
+        if self.scenario.checkpoint_dir is None:
+            self.checkpoint = None
+        else:
+            self.checkpoint = Checkpoint.Checkpoint(
+                self.scenario.checkpoint_dir, run_number,
+                self.scenario.checkpoint_interval)
+
+        # Set up attributes that record where the processes have got to,
+        # so they can be restarted from a checkpoint - the patients in the
+        # clinic (by ID) and when the next patient will arrive (the breaks
+        # keep track of where they have got to themselves)
+        self.patients_in_clinic = {}
+        self.next_arrival_time = 0
 
         # Set up attributes that will store mean queuing times across the run
         self.mean_q_time_nurse = 0
@@ -67,114 +247,159 @@ class Model:
         self.num_reneged_nurse = 0
         self.num_balked_nurse = 0
 
-        # Set up lists to store patient objects in each queue
-        self.q_for_nurse_consult = []
+        # Set up a monitor to keep time-weighted statistics about the length of
+        # the queue for the nurse (from the end of the warm-up period)
+        self.q_nurse_monitor = QueueMonitor.QueueMonitor(
+            start_time=self.scenario.warm_up_period)
 
-        ##NEW - added Pandas dataframe to record number in queue(s) over time
-        self.queue_df = pd.DataFrame()
-        self.queue_df["Time"] = [0.0]
-        self.queue_df["Num in Q Nurse"] = [0]
+        # Set up queues to store patient objects in each queue (these keep the
+        # monitors up to date whenever a patient joins or leaves)
+        self.q_for_nurse_consult = PatientQueue.PatientQueue(
+            self.env, self.q_nurse_monitor)
+
+        ##NEW - added a log to record number in queue(s) over time.  Like the
+        # results log, this is turned into a Pandas dataframe (queue_df) if
+        # it's asked for once the run is over.
+        self.queue_log = EventLog.EventLog({
+            "Time": "float64",
+            "Num in Q Nurse": "int64"
+        })
 
     # Generator function that represents the DES generator for patient arrivals
     def generator_patient_arrivals(self):
-        while True:
+        for sampled_inter, attributes in self.arrivals:
             self.patient_counter += 1
             
-            p = Patient(self.patient_counter)
+            p = Patient(self.patient_counter, *attributes)
 
             self.env.process(self.attend_clinic(p))
 
-            sampled_inter = random.expovariate(1.0 / g.patient_inter)
-
+            self.next_arrival_time = self.env.now + sampled_inter
             yield self.env.timeout(sampled_inter)
 
-    # Generator function to obstruct a nurse resource at specified intervals
-    # for specified amounts of time
-    def obstruct_nurse(self):
-        while True:
-            # The generator first pauses for the frequency period
-            yield self.env.timeout(g.unav_freq_nurse)
-
-            # Once elapsed, the generator requests (demands?) a nurse with
-            # a priority of -1.  This ensure it takes priority over any patients
-            # (whose priority values start at 1).  But it also means that the
-            # nurse won't go on a break until they've finished with the current
-            # patient
-            with self.nurse.request(priority=-1) as req:
-                yield req
-                
-                # Freeze with the nurse held in place for the unavailability
-                # time (ie duration of the nurse's break).  Here, both the
-                # duration and frequency are fixed, but you could randomly
-                # sample them from a distribution too if preferred.
-                yield self.env.timeout(g.unav_time_nurse)
-                
     # Generator function representing pathway for patients attending the
     # clinic.
     def attend_clinic(self, patient):
         # Check if current queue length is less than maximum
-        if len(self.q_for_nurse_consult) < g.max_q_nurse:
+        if len(self.q_for_nurse_consult) < self.scenario.max_q_nurse:
             # Nurse consultation activity
-            start_q_nurse = self.env.now
+            patient.start_q_nurse = self.env.now
 
             self.q_for_nurse_consult.append(patient)
 
             ##NEW - as we've added a patient to the queue, we now need to record
-            # the current time against the number in the queue.  We use .loc and
-            # give the index as the length of the queue to add the row to the
-            # end of the dataframe.  Note - we'd need to add additional items
-            # to the list forming the row if we were tracking more than one
+            # the current time against the number in the queue.  We append a
+            # new row to the end of the queue log.  Note - we'd need to add
+            # additional items to the row if we were tracking more than one
             # queue.  Also note, we will only add queue lengths to be plot if
             # they are after the warm-up period.
-            if self.env.now > g.warm_up_period:
-                self.queue_df.loc[len(self.queue_df)] = [
+            if (self.scenario.record_queue_trace and
+                self.env.now > self.scenario.warm_up_period):
+                self.queue_log.append(
+                    self.env.now,
+                    len(self.q_for_nurse_consult)
+                )
+
+            yield from self.queue_for_nurse(patient, patient.patience_nurse)
+        else:
+            self.num_balked_nurse += 1
+
+            if self.patient_sink is not None:
+                self.patient_sink.append(
+                    self.run_number, patient.id, self.env.now,
+                    patient.priority, float("nan"), False, True)
+
+    # Generator function for a patient queuing for the nurse (for as long as
+    # their patience lasts) and then seeing them.  This is separate from
+    # attend_clinic so patients who were in the queue when a checkpoint was
+    # saved can be put back in it, with the patience they had left, when the
+    # run is resumed.
+    def queue_for_nurse(self, patient, patience):
+        self.patients_in_clinic[patient.id] = patient
+
+        with self.nurse.request(priority=patient.priority) as req:
+            result_of_queue = (yield req | self.env.timeout(patience))
+
+            self.q_for_nurse_consult.remove(patient)
+
+            # Stream the patient's results to disk - how long they queued
+            # for, and whether they were seen or reneged
+            if self.patient_sink is not None:
+                self.patient_sink.append(
+                    self.run_number, patient.id, patient.start_q_nurse,
+                    patient.priority, self.env.now - patient.start_q_nurse,
+                    req not in result_of_queue, False)
+
+            ##NEW - as we've removed a patient from the queue, we now need
+            # to record the current time against the number in the queue.  
+            # We append a new row to the end of the queue log.  Note - we'd
+            # need to add additional items to the row if we were tracking
+            # more than one queue.  Also note, we will only add queue
+            # lengths to be plot if they are after the warm-up period.
+            if (self.scenario.record_queue_trace and
+                self.env.now > self.scenario.warm_up_period):
+                self.queue_log.append(
                     self.env.now,
                     len(self.q_for_nurse_consult)
-                ]
-
-            with self.nurse.request(priority=patient.priority) as req:
-                result_of_queue = (yield req | 
-                                self.env.timeout(patient.patience_nurse))
-
-                self.q_for_nurse_consult.remove(patient)
-
-                ##NEW - as we've removed a patient from the queue, we now need
-                # to record the current time against the number in the queue.  
-                # We use .loc and give the index as the length of the queue to 
-                # add the row to the end of the dataframe.  Note - we'd need to 
-                # add additional items to the list forming the row if we were 
-                # tracking more than one queue.  Also note, we will only add 
-                # queue lengths to be plot if they are after the warm-up period.
-                if self.env.now > g.warm_up_period:
-                    self.queue_df.loc[len(self.queue_df)] = [
-                        self.env.now,
-                        len(self.q_for_nurse_consult)
-                    ]
+                )
                 
-                if req in result_of_queue:
-                    end_q_nurse = self.env.now
+            if req in result_of_queue:
+                end_q_nurse = self.env.now
 
-                    patient.q_time_nurse = end_q_nurse - start_q_nurse
+                patient.q_time_nurse = end_q_nurse - patient.start_q_nurse
 
-                    if self.env.now > g.warm_up_period:
-                        self.results_df.at[patient.id, "Q Time Nurse"] = (
-                            patient.q_time_nurse
-                        )
+                if self.env.now > self.scenario.warm_up_period:
+                    self.results_log.append(
+                        patient.id, self.env.now, patient.q_time_nurse)
 
-                    sampled_nurse_act_time = Lognormal.Lognormal(
-                        g.mean_n_consult_time, g.sd_n_consult_time).sample()
+                sampled_nurse_act_time = (
+                    self.nurse_consult_time_dist.sample()
+                )
 
-                    yield self.env.timeout(sampled_nurse_act_time)
-                else:
-                    self.num_reneged_nurse += 1
-        else:
-            self.num_balked_nurse += 1
+                patient.nurse_consult_end = (self.env.now +
+                                             sampled_nurse_act_time)
+                yield self.env.timeout(sampled_nurse_act_time)
+            else:
+                self.num_reneged_nurse += 1
+
+        del self.patients_in_clinic[patient.id]
+
+    # Generator function for a patient finishing their consultation with the
+    # nurse, when the run is resumed from a checkpoint saved during it
+    def resume_nurse_consult(self, patient):
+        with self.nurse.request(priority=patient.priority) as req:
+            yield req
+
+            yield self.env.timeout(patient.nurse_consult_end - self.env.now)
+
+        del self.patients_in_clinic[patient.id]
+
+    # The patient-level results for the run as a DataFrame, indexed by
+    # Patient ID.  This is only made (and pandas only imported) the first time
+    # it's asked for, as most runs only need the means worked out below.
+    @cached_property
+    def results_df(self):
+        results_df = self.results_log.to_dataframe()
+        results_df.set_index("Patient ID", inplace=True)
+
+        return results_df
+
+    # The queue lengths recorded over the run as a DataFrame (again, only made
+    # the first time it's asked for)
+    @cached_property
+    def queue_df(self):
+        return self.queue_log.to_dataframe()
 
     # Method to calculate and store results over the run
     def calculate_run_results(self):
-        self.results_df.drop([1], inplace=True)
+        self.mean_q_time_nurse = self.results_log.mean("Q Time Nurse")
 
-        self.mean_q_time_nurse = self.results_df["Q Time Nurse"].mean()
+        # Add on the time spent at the final queue length(s) up to the end of
+        # the run, and store the queue length statistics for the run
+        self.q_nurse_monitor.finalise(self.env.now)
+        self.mean_q_length_nurse = self.q_nurse_monitor.mean()
+        self.max_q_length_nurse = self.q_nurse_monitor.max_seen
+        self.p95_q_length_nurse = self.q_nurse_monitor.percentile(0.95)
 
     ##NEW - method to plot and display queue lengths over time.  We plot the
     # data stored in our queue dataframe.  Here, we only have one queue, but if
@@ -182,9 +407,7 @@ class Model:
     # with a different colour and / or linestyle and label.  "Time" will be the 
     # x-axis for all plots.
     def plot_queue_graphs(self):
-        ##NEW drop the first element from the DataFrame as we don't want to plot
-        # that first dummy entry that won't get used with a warm-up period
-        self.queue_df.drop([0], inplace=True)
+        import matplotlib.pyplot as plt ##NEW - import matplotlib for graphs
 
         fig, ax = plt.subplots()
 
@@ -201,39 +424,100 @@ class Model:
         
         fig.show()
     
-    # Method to run a single run of the simulation
-    def run(self):
-        # Start up DES generators
+    # Method to start up the DES generators of a new run (the rest of
+    # starting a run is done by ModelBase)
+    def start_processes(self):
         self.env.process(self.generator_patient_arrivals())
-        self.env.process(self.obstruct_nurse())
-
-        # Run for the duration specified in g class
-        self.env.run(until=(g.sim_duration + g.warm_up_period))
-
-        # Calculate results over the run
-        self.calculate_run_results()
-
+        self.env.process(self.nurse_breaks.take_breaks())
+
+    # Method to restart the processes of a run carried on from a checkpoint
+    # at the given time, once its state has been put back
+    def resume_processes(self, now):
+        # The patient queues are saved without the SimPy environment (which
+        # can't be saved), so give it back to them
+        self.q_for_nurse_consult.env = self.env
+
+        # The breaks are saved without the SimPy environment and the
+        # resource (which can't be saved), so give them back to them
+        self.nurse_breaks.env = self.env
+        self.nurse_breaks.resource = self.nurse
+
+        # Restart the nurse's breaks, and put the patients back with the nurse
+        # - those who were seeing the nurse first, and then those who were
+        # queuing, in the order they were in the queue
+        self.env.process(self.nurse_breaks.resume_breaks())
+
+        for patient in sorted(self.patients_in_clinic.values(),
+                              key=lambda p: (p.nurse_consult_end is None,
+                                             p.priority, p.start_q_nurse,
+                                             p.id)):
+            if patient.nurse_consult_end is None:
+                # (with the patience they had left)
+                patience = max(patient.start_q_nurse +
+                               patient.patience_nurse - now, 0)
+                self.env.process(self.queue_for_nurse(patient, patience))
+            else:
+                self.env.process(self.resume_nurse_consult(patient))
+
+    # Method to print results for this run
+    def print_run_results(self):
         # Print patient level results for this run
         print (f"Run Number {self.run_number}")
         print (self.results_df)
         print (f"{self.num_reneged_nurse} patients reneged from nurse queue")
         print (f"{self.num_balked_nurse} patients balked at the nurse queue")
-        ##NEW - we print the queues over time dataframe for this run
-        print ("Queues over time")
-        print (self.queue_df)
-
-        ##NEW - call our new method to plot queue lengths over time
-        self.plot_queue_graphs()
+        print ("Nurse queue length :",
+               f"mean {self.mean_q_length_nurse:.2f},",
+               f"max {self.max_q_length_nurse},",
+               f"95th percentile {self.p95_q_length_nurse}")
+        ##NEW - we print the queues over time dataframe for this run (if we
+        # recorded them)
+        if self.scenario.record_queue_trace:
+            print ("Queues over time")
+            print (self.queue_df)
+
+            # (and plot them)
+            self.plot_queue_graphs()
+
+    # Method to return the results of the finished run that are stored
+    # against the run in the trial results
+    def replication_results(self):
+        return [self.mean_q_time_nurse,
+                self.num_reneged_nurse,
+                self.num_balked_nurse,
+                self.mean_q_length_nurse,
+                self.max_q_length_nurse]
 
 # Class representing a Trial for our simulation
-class Trial:
+class Trial(TrialBase.TrialBase):
+    # Model class to run in each run of the trial
+    model_class = Model
+
     # Constructor
-    def  __init__(self):
+    def  __init__(self, scenario=None, headless=False):
+        # Set the parameter values to use for every run in the trial (the
+        # values in the g class, unless a different scenario has been passed
+        # in)
+        if scenario is None:
+            scenario = Scenario.Scenario.from_class(g)
+        self.scenario = scenario
+
+        # Set whether to run without printing or plotting anything
+        self.headless = headless
+
+        # pandas is only imported here, for the table of trial results, so
+        # that worker processes (which only do runs) don't need to import it
+        import pandas as pd
+
         self.df_trial_results = pd.DataFrame()
         self.df_trial_results["Run Number"] = [0]
         self.df_trial_results["Mean Q Time Nurse"] = [0.0]
         self.df_trial_results["Reneged Q Nurse"] = [0]
         self.df_trial_results["Balked Q Nurse"] = [0]
+        # Columns to store time-weighted mean queue length and maximum queue
+        # length in each run
+        self.df_trial_results["Mean Q Length Nurse"] = [0.0]
+        self.df_trial_results["Max Q Length Nurse"] = [0]
         self.df_trial_results.set_index("Run Number", inplace=True)
 
     # Method to calculate and store means across runs in the trial
@@ -249,6 +533,14 @@ class Trial:
         self.mean_balked_q_nurse = (
             self.df_trial_results["Balked Q Nurse"].mean()
         )
+
+        self.mean_q_length_nurse_trial = (
+            self.df_trial_results["Mean Q Length Nurse"].mean()
+        )
+
+        self.mean_max_q_length_nurse = (
+            self.df_trial_results["Max Q Length Nurse"].mean()
+        )
     
     # Method to print trial results, including averages across runs
     def print_trial_results(self):
@@ -258,21 +550,14 @@ class Trial:
         print (f"Mean Q Nurse : {self.mean_q_time_nurse_trial:.1f} minutes")
         print (f"Mean Reneged Q Nurse : {self.mean_reneged_q_nurse} patients")
         print (f"Mean Balked Q Nurse : {self.mean_balked_q_nurse} patients")
-
-    # Method to run trial
-    def run_trial(self):
-        for run in range(g.number_of_runs):
-            my_model = Model(run)
-            my_model.run()
-            
-            self.df_trial_results.loc[run] = [my_model.mean_q_time_nurse,
-                                              my_model.num_reneged_nurse,
-                                              my_model.num_balked_nurse]
-
-        self.calculate_means_over_trial()
-        self.print_trial_results()
-
-# Create new instance of Trial and run it
-my_trial = Trial()
-my_trial.run_trial()
+        print ("Mean Q Length Nurse :",
+               f"{self.mean_q_length_nurse_trial:.1f} patients")
+        print ("Mean Max Q Length Nurse :",
+               f"{self.mean_max_q_length_nurse:.1f} patients")
+
+# Create new instance of Trial and run it.  The if statement stops the trial
+# from being run again when worker processes import this file.
+if __name__ == "__main__":
+    my_trial = Trial()
+    my_trial.run_trial()
 
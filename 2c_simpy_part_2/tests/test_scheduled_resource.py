@@ -0,0 +1,52 @@
+import simpy
+
+from lecture_examples import ScheduledResource
+
+
+def use(env, resource, start, duration, log, name):
+    yield env.timeout(start)
+    with resource.request(priority=1) as req:
+        yield req
+        log.append((env.now, "start", name))
+        yield env.timeout(duration)
+
+
+def take_break(env, resource, start, duration, log, name):
+    yield env.timeout(start)
+    yield resource.take_off()
+    log.append((env.now, "off", name))
+    yield env.timeout(duration)
+    resource.put_back()
+
+
+def test_overlapping_breaks_start_as_each_unit_is_released():
+    env = simpy.Environment()
+    resource = ScheduledResource.ScheduledResource(env, capacity=2)
+    log = []
+
+    env.process(use(env, resource, 0, 5, log, "a"))
+    env.process(use(env, resource, 0, 7, log, "b"))
+    env.process(take_break(env, resource, 1, 10, log, "break 1"))
+    env.process(take_break(env, resource, 2, 10, log, "break 2"))
+    env.process(use(env, resource, 3, 1, log, "c"))
+    env.run()
+
+    assert (5, "off", "break 1") in log
+    assert (7, "off", "break 2") in log
+    # The patient waiting since time 3 only gets a unit once a break ends
+    assert (15, "start", "c") in log
+
+
+def test_break_with_a_free_unit_starts_straight_away():
+    env = simpy.Environment()
+    resource = ScheduledResource.ScheduledResource(env, capacity=2)
+    log = []
+
+    env.process(use(env, resource, 0, 5, log, "a"))
+    env.process(take_break(env, resource, 1, 10, log, "break 1"))
+    env.process(take_break(env, resource, 2, 10, log, "break 2"))
+    env.run()
+
+    assert (1, "off", "break 1") in log
+    assert (5, "off", "break 2") in log
+    assert resource.capacity == 2